@@ -0,0 +1,224 @@
+"""
+Накладные расходы клиента на локальном fake_server: запросы в секунду, p50/p99 задержки,
+стоимость разбора одного аккаунта/операции. Сценарии http2 идут через HttpxTransport
+на FakeH2Server (нужны httpx[http2]), их стоит сравнивать с sync того же параллелизма.
+
+    python benchmarks/bench_client.py [--requests 500] [--latency 0] [--error-rate 0]
+                                      [--only market_item] [--save result.json] [--compare baseline.json]
+
+Сервер и данные детерминированы, каждый сценарий повторяется --repeat раз и берется медиана,
+поэтому результаты можно сохранять (--save) и сравнивать с прошлым запуском (--compare).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_server import FakeAPI, FakeH2Server, FakeServer, USER_ID  # noqa: E402
+
+from pylolzapi import LZTApi  # noqa: E402
+from pylolzapi.api.transport import HttpxTransport, RequestsTransport  # noqa: E402
+from pylolzapi.utils.decoder import get_loads  # noqa: E402
+from pylolzapi.utils.retry import RetryPolicy  # noqa: E402
+
+
+def client(cls, server: FakeServer, **kwargs):
+    api = cls("token", rate_limiter=False, user_id=USER_ID, retry=RetryPolicy(backoff=0.001), **kwargs)
+    api._base_url = server.url
+    return api
+
+
+def collect(api) -> list[float]:
+    latencies = []
+    api.hooks["response"].append(lambda event: latencies.append(event["timings"]["total"]))
+    return latencies
+
+
+def sync_market_item(server, n):
+    api = client(LZTApi, server)
+    latencies = collect(api)
+    for i in range(n):
+        api.market_item(i + 1)
+    return latencies
+
+
+def sync_market_list(server, n):
+    api = client(LZTApi, server)
+    latencies = collect(api)
+    for i in range(n):
+        api.market_list("steam", page=i % 50 + 1)
+    return latencies
+
+
+def sync_market_payments(server, n):
+    api = client(LZTApi, server)
+    latencies = collect(api)
+    for i in range(n):
+        api.market_payments(page=i % 50 + 1)
+    return latencies
+
+
+def sync_market_items_x8(server, n):
+    api = client(LZTApi, server)
+    latencies = collect(api)
+    api.market_items(range(1, n + 1), concurrency=8)
+    return latencies
+
+
+def sync_market_items_x32(server, n):
+    api = client(LZTApi, server, transport=RequestsTransport(pool_maxsize=32))
+    latencies = collect(api)
+    api.market_items(range(1, n + 1), concurrency=32)
+    return latencies
+
+
+def http2_market_items_x32(server, n):
+    # Запускается на FakeH2Server: 32 потока делят одно соединение.
+    api = client(LZTApi, server, transport=HttpxTransport(http1=False, http2=True))
+    latencies = collect(api)
+    api.market_items(range(1, n + 1), concurrency=32)
+    return latencies
+
+
+def async_market_item_x32(server, n):
+    from pylolzapi import AsyncLZTApi
+
+    async def run():
+        async with client(AsyncLZTApi, server) as api:
+            latencies = collect(api)
+            await api.market_items(range(1, n + 1), concurrency=32)
+            return latencies
+
+    return asyncio.run(run())
+
+
+SCENARIOS = {
+    "sync market_item": sync_market_item,
+    "sync market_list": sync_market_list,
+    "sync market_payments": sync_market_payments,
+    "sync market_items x8": sync_market_items_x8,
+    "sync market_items x32": sync_market_items_x32,
+    "http2 market_items x32": http2_market_items_x32,
+    "async market_items x32": async_market_item_x32,
+}
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def bench_requests(name: str, server: FakeServer, n: int, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        latencies = SCENARIOS[name](server, n)
+        elapsed = time.perf_counter() - started
+        runs.append({
+            "rps": n / elapsed,
+            "p50_ms": percentile(latencies, 0.5) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+        })
+
+    return {key: round(statistics.median(run[key] for run in runs), 3) for key in runs[0]}
+
+
+def bench_decode(repeat: int, rounds: int = 50) -> dict:
+    """Разбор страницы из ответа в модели без сети: микросекунд на запись."""
+    api = FakeAPI(per_page=40)
+    pages = {
+        "items": api.body("GET", "market/steam", {}),
+        "payments": api.body("GET", f"market/user/{USER_ID}/payments", {}),
+    }
+    results = {}
+
+    for backend in ("json", "orjson"):
+        try:
+            loads = get_loads(backend)
+        except ImportError:
+            continue
+
+        for decode in ("model", "lazy"):
+            parser = LZTApi("token", decode=decode)
+            for key, body in pages.items():
+                parse = parser._item if key == "items" else parser._operation
+                runs = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    for _ in range(rounds):
+                        records = loads(body)[key]
+                        records = records.values() if isinstance(records, dict) else records
+                        parsed = [parse(record) for record in records]
+                    runs.append((time.perf_counter() - started) / (rounds * len(parsed)))
+                results[f"decode {key} {decode} {backend}"] = {"us_per_record": round(statistics.median(runs) * 1e6, 3)}
+
+    return results
+
+
+def compare(results: dict, baseline: dict):
+    print("\nСравнение с baseline (+ хуже, - лучше):")
+    for name, metrics in results.items():
+        for key, value in metrics.items():
+            old = baseline.get(name, {}).get(key)
+            if not old:
+                continue
+            change = (value - old) / old * 100
+            if key == "rps":
+                change = -change
+            print(f"  {name:<36} {key:<14} {old:>10} -> {value:>10}  {change:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--only", action="append", help="Запустить только сценарии, имя которых содержит строку")
+    parser.add_argument("--save")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        SCENARIOS.pop("async market_items x32")
+    try:
+        import h2  # noqa: F401
+        import httpx  # noqa: F401
+    except ImportError:
+        SCENARIOS.pop("http2 market_items x32")
+
+    results = {}
+    with FakeServer(latency=args.latency, error_rate=args.error_rate) as server, \
+            FakeH2Server(latency=args.latency, error_rate=args.error_rate) as h2_server:
+        for name in SCENARIOS:
+            if args.only and not any(part in name for part in args.only):
+                continue
+            target = h2_server if name.startswith("http2") else server
+            results[name] = result = bench_requests(name, target, args.requests, args.repeat)
+            print(f"{name:<36} {result['rps']:>10.1f} req/s  p50 {result['p50_ms']:>8.3f} ms  "
+                  f"p99 {result['p99_ms']:>8.3f} ms")
+
+    if not args.only or any("decode" in part for part in args.only):
+        for name, result in bench_decode(args.repeat).items():
+            results[name] = result
+            print(f"{name:<36} {result['us_per_record']:>10.3f} us/record")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
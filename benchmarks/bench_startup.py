@@ -0,0 +1,91 @@
+"""
+Время импорта pylolzapi и создания клиента, количество запросов до первого ответа.
+
+    python benchmarks/bench_startup.py [--runs 20]
+
+Каждый замер делается в отдельном процессе, чтобы не мешал кэш модулей.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPETS = {
+    "import pylolzapi": "import pylolzapi",
+    "import + LZTApi()": "import pylolzapi\napi = pylolzapi.LZTApi('token')",
+    "import + LZTApi() + market_item()": """
+import json
+import requests
+import pylolzapi
+
+
+class CountingAdapter(requests.adapters.BaseAdapter):
+    calls = 0
+
+    def send(self, request, **kwargs):
+        CountingAdapter.calls += 1
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({"item_id": 1, "price": 100}).encode()
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+api = pylolzapi.LZTApi('token', rate_limiter=False)
+api._session.mount('https://', CountingAdapter())
+api.market_item(1)
+REQUESTS = CountingAdapter.calls
+""",
+}
+
+RUNNER = """
+import time
+start = time.perf_counter()
+exec(compile({code!r}, "<bench>", "exec"))
+elapsed = time.perf_counter() - start
+print(__import__("json").dumps({{"elapsed": elapsed, "requests": globals().get("REQUESTS")}}))
+"""
+
+
+def measure(code: str, runs: int) -> dict:
+    timings, requests = [], None
+    env = {**os.environ, "PYTHONPATH": ROOT + os.pathsep + os.environ.get("PYTHONPATH", "")}
+
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", RUNNER.format(code=code)], env=env,
+                             capture_output=True, text=True, check=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        timings.append(result["elapsed"] * 1000)
+        requests = result["requests"]
+
+    return {
+        "median_ms": round(statistics.median(timings), 2),
+        "min_ms": round(min(timings), 2),
+        "max_ms": round(max(timings), 2),
+        "requests": requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, code in SNIPPETS.items():
+        result = measure(code, args.runs)
+        line = f"{name:<36} median {result['median_ms']:>8} ms  min {result['min_ms']:>8} ms  max {result['max_ms']:>8} ms"
+        if result["requests"] is not None:
+            line += f"  requests {result['requests']}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
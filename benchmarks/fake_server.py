@@ -0,0 +1,449 @@
+"""
+Локальная замена api.zelenka.guru для бенчмарков и отладки без реального API.
+
+    python benchmarks/fake_server.py [--port 8000] [--latency 0.05] [--error-rate 0.01] [--http2]
+
+Отдает users/me, market, market/{category} (с фильтром pmin/pmax), market/{id},
+market/user/{id}/payments, остальные запросы (покупки, bump, ...) отвечают {"status": "ok"}.
+Ответы генерируются детерминированно по ID записей и кэшируются, поэтому сервер почти
+не добавляет своих задержек.
+
+    with FakeServer(latency=0.02) as server:
+        api = LZTApi("token")
+        api._base_url = server.url
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import itertools
+import json
+import random
+import re
+import socket
+import socketserver
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+CATEGORIES = {
+    "steam": 1, "vkontakte": 2, "origin": 3, "warface": 4, "uplay": 5, "socialclub": 7, "fortnite": 9,
+    "instagram": 10, "battlenet": 11, "epicgames": 12, "world-of-tanks": 14, "supercell": 15,
+    "wot-blitz": 16, "genshin-impact": 17, "escape-from-tarkov": 18, "vpn": 19, "tiktok": 20,
+    "discord": 22, "cinema": 23, "telegram": 24, "youtube": 25,
+}
+ORIGINS = ("brute", "phishing", "stealer", "personal", "resale", "autoreg", "dummy")
+OPERATION_TYPES = ("sold_item", "paid_item", "receiving_money", "withdrawal_balance", "refilled_balance")
+
+NOW = 1_700_000_000
+USER_ID = 1
+
+_ITEM_RE = re.compile(r"^market/(\d+)$")
+_EMAIL_RE = re.compile(r"^market/(\d+)/email-code$")
+_CHECK_RE = re.compile(r"^market/(\d+)/check-account$")
+_PAYMENTS_RE = re.compile(r"^market/user/\d+/payments$")
+_LIST_RE = re.compile(r"^market(?:/([\w-]+))?$")
+
+
+def make_user(user_id: int = USER_ID) -> dict:
+    return {
+        "user_id": user_id, "username": f"user{user_id}", "user_message_count": 120, "user_register_date": NOW - 10**7,
+        "user_like_count": 15, "short_link": f"user{user_id}", "user_email": f"user{user_id}@example.com",
+        "user_unread_notification_count": 0, "user_dob_day": 1, "user_dob_month": 1, "user_dob_year": 2000,
+        "user_title": "", "user_is_valid": True, "user_is_verified": True, "user_is_followed": False,
+        "user_last_seen_date": NOW,
+        "links": {key: f"https://zelenka.guru/members/{user_id}/{key}" for key in
+                  ("permalink", "detail", "avatar", "avatar_big", "avatar_small", "followers", "followings",
+                   "ignore", "timeline")},
+        "permissions": {"edit": True, "follow": False, "ignore": False, "profile_post": True},
+        "user_is_ignored": False, "user_is_visitor": True, "user_timezone_offset": 10800, "user_has_password": True,
+        "fields": [{"id": "telegram", "title": "Telegram", "description": "", "position": "contact",
+                    "is_required": False, "value": "", "is_multi_choice": False}],
+        "user_groups": [{"user_group_id": 2, "user_group_title": "Registered", "is_primary_group": True}],
+        "self_permissions": {"create_conversation": True, "upload_attachment_conversation": True},
+        "edit_permissions": {key: True for key in
+                             ("password", "user_email", "username", "user_title", "primary_group_id",
+                              "secondary_group_ids", "user_dob_day", "user_dob_month", "user_dob_year", "fields")},
+    }
+
+
+def item_price(item_id: int) -> int:
+    return random.Random(item_id).randint(10, 5000)
+
+
+def make_item(item_id: int, category_id: int = 1, published_date: int = None) -> dict:
+    rnd = random.Random(item_id)
+    price = rnd.randint(10, 5000)
+    published_date = published_date if published_date is not None else NOW - item_id % 100000
+    return {
+        "item_id": item_id, "item_state": "active", "category_id": category_id, "published_date": published_date,
+        "title": f"Аккаунт #{item_id} с играми", "description": "Полный доступ, родная почта. " * 3,
+        "price": price, "update_stat_date": published_date, "refreshed_date": published_date,
+        "view_count": rnd.randint(0, 500), "is_sticky": 0, "item_origin": rnd.choice(ORIGINS),
+        "extended_guarantee": 0, "nsb": 1, "allow_ask_discount": 1, "title_en": f"Account #{item_id} with games",
+        "description_en": "Full access, native mail. " * 3, "email_type": "native", "is_reserved": 0,
+        "item_domain": "gmail.com", "isIgnored": False, "canOpenItem": False, "canCloseItem": False,
+        "canEditItem": False, "canDeleteItem": False, "canStickItem": False, "canUnstickItem": False,
+        "bumpSettings": {"canBumpItem": False, "canBumpItemGlobally": False, "errorPhrase": None},
+        "canBumpItem": False, "canBuyItem": True, "rub_price": price, "price_currency": "rub",
+        "canValidateAccount": True, "canResellItemAfterPurchase": True, "canViewAccountLink": True,
+        "accountLink": f"https://steamcommunity.com/profiles/{76561190000000000 + item_id}",
+        "note_text": None, "tags": [], "reserve": None,
+        "description_html": "Полный доступ, <b>родная почта</b>.",
+        "description_html_en": "Full access, <b>native mail</b>.",
+    }
+
+
+def make_operation(operation_id: int) -> dict:
+    rnd = random.Random(operation_id)
+    kind = rnd.choice(OPERATION_TYPES)
+    amount = rnd.randint(10, 5000)
+    incoming = kind in ("sold_item", "receiving_money", "refilled_balance")
+    is_hold = int(kind == "sold_item" and rnd.random() < 0.3)
+    return {
+        "operation_id": operation_id, "operation_date": NOW - (10**6 - operation_id) * 60, "operation_type": kind,
+        "outgoing_sum": 0 if incoming else amount, "incoming_sum": amount if incoming else 0,
+        "item_id": rnd.randint(1, 10**6) if kind in ("sold_item", "paid_item") else 0, "wallet": "",
+        "is_finished": 1, "is_hold": is_hold, "payment_system": "", "data": False,
+        "hold_end_date": NOW + 86400 if is_hold else 0, "api": 1, "originalWallet": None,
+        "payment_status": "paid", "supportLink": None, "canCancelBalanceTransfer": False,
+        "canCancelBalancePayout": False, "canFinishBalanceTransfer": False, "canFinishBalancePayout": False,
+        "label": {"title": kind}, "user": {"user_id": USER_ID, "user_balance": 1000, "user_hold": 0,
+                                           "user_balance_with_hold": 1000},
+    }
+
+
+class FakeAPI:
+    def __init__(self, per_page: int = 40, total_items: int = 2000, total_operations: int = 2000,
+                 email_delay: float = 3.0, check_fail_every: int = 0):
+        """
+        Генератор ответов. Страницы детерминированы: одинаковый запрос - одинаковые байты.
+        :param per_page: Записей на странице
+        :param total_items: Сколько аккаунтов в каждой категории
+        :param total_operations: Сколько операций в истории платежей
+        :param email_delay: Через сколько секунд после первого market/{id}/email-code приходит код
+        :param check_fail_every: market/{id}/check-account отвечает ошибкой для id, кратных этому числу (0 - никогда)
+        """
+        self.per_page = per_page
+        self.total_items = total_items
+        self.total_operations = total_operations
+        self._cache: dict[tuple, bytes] = {}
+        self._lock = threading.Lock()
+        self._added = itertools.count(9 * 10**8)
+        self._filtered: dict[tuple, list[int]] = {}
+        self.email_delay = email_delay
+        self.check_fail_every = check_fail_every
+        self._email_requested: dict[int, float] = {}
+
+    def handle(self, method: str, path: str, query: dict) -> dict:
+        page = max(1, int(query.get("page", 1)))
+        first = (page - 1) * self.per_page
+
+        if method == "POST" and path == "market/item/add":
+            return {"status": "ok", "item": {"item_id": next(self._added)}}
+        match = _CHECK_RE.match(path)
+        if match and self.check_fail_every and int(match.group(1)) % self.check_fail_every == 0:
+            return {"errors": ["Аккаунт не прошел проверку"]}
+        if method != "GET":
+            return {"status": "ok"}
+        if path == "users/me":
+            return {"user": make_user()}
+
+        match = _EMAIL_RE.match(path)
+        if match:
+            # Письмо приходит через email_delay секунд после первого запроса кода.
+            item_id = int(match.group(1))
+            with self._lock:
+                first = self._email_requested.setdefault(item_id, time.time())
+            if time.time() - first < self.email_delay:
+                return {"errors": ["Письмо с кодом не найдено"]}
+            return {"item": {"item_id": item_id}, "codeData": {"code": str(100000 + item_id % 900000),
+                                                                "date": int(first + self.email_delay)}}
+
+        match = _ITEM_RE.match(path)
+        if match:
+            # Клиент разбирает market/{id} как Item целиком, поэтому поля аккаунта на верхнем уровне.
+            return {**make_item(int(match.group(1))), "canViewItemViews": False}
+
+        if _PAYMENTS_RE.match(path):
+            ids = range(self.total_operations - first, max(0, self.total_operations - first - self.per_page), -1)
+            return {"payments": {str(i): make_operation(i) for i in ids}, "page": page,
+                    "hasNextPage": first + self.per_page < self.total_operations}
+
+        match = _LIST_RE.match(path)
+        if match:
+            category_id = CATEGORIES.get(match.group(1) or "steam", 1)
+            offsets = self._offsets(category_id, query.get("pmin"), query.get("pmax"))
+            return {"items": [make_item(category_id * 10**7 + i, category_id, NOW - i)
+                              for i in offsets[first:first + self.per_page]],
+                    "totalItems": len(offsets), "perPage": self.per_page, "page": page}
+
+        return {"status": "ok"}
+
+    def _offsets(self, category_id: int, pmin: str = None, pmax: str = None) -> range | list[int]:
+        if pmin is None and pmax is None:
+            return range(self.total_items)
+
+        key = (category_id, pmin, pmax)
+        offsets = self._filtered.get(key)
+        if offsets is None:
+            low, high = int(pmin or 0), int(pmax) if pmax is not None else float("inf")
+            offsets = self._filtered[key] = [i for i in range(self.total_items)
+                                             if low <= item_price(category_id * 10**7 + i) <= high]
+        return offsets
+
+    def body(self, method: str, path: str, query: dict) -> bytes:
+        key = (method, path, tuple(sorted(query.items())))
+        body = self._cache.get(key)
+        if body is None:
+            body = json.dumps(self.handle(method, path, query), ensure_ascii=False).encode()
+            # Ответ email-code меняется со временем.
+            if method == "GET" and not _EMAIL_RE.match(path):
+                with self._lock:
+                    self._cache[key] = body
+
+        return body
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Очередь соединений по умолчанию (5) переполняется при десятках одновременных клиентов.
+    request_queue_size = 1024
+
+
+class FakeServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, error_statuses: tuple = (429, 502), seed: int = 0, api: FakeAPI = None):
+        """
+        HTTP/1.1 сервер с keep-alive в отдельном потоке.
+        :param port: 0 - любой свободный
+        :param latency: Задержка перед ответом, секунды
+        :param jitter: Случайная добавка к задержке от 0 до jitter
+        :param error_rate: Доля запросов, которые получают ошибку из error_statuses
+        :param error_statuses: 429 отдается с Retry-After: 0, остальные - HTML страницей как у API
+        :param seed: Seed для задержек и ошибок
+        :param api: Генератор ответов
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.api = api or FakeAPI()
+        self.requests = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = self._listen(host, port)
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _listen(self, host: str, port: int) -> socketserver.TCPServer:
+        return _Server((host, port), self._handler())
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Заголовки и тело одним пакетом, иначе Nagle и delayed ACK добавляют ~40 мс на запрос.
+            wbufsize = 1 << 16
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.respond(self)
+
+            do_POST = do_DELETE = do_PUT = do_GET
+
+            def do_HEAD(self):
+                # Прогрев соединения клиентом: только заголовки.
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        return Handler
+
+    def _draw(self) -> tuple[float, int | None]:
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._random.random() * self.jitter if self.jitter else 0)
+            status = self._random.choice(self.error_statuses) \
+                if self.error_rate and self._random.random() < self.error_rate else None
+
+        return delay, status
+
+    def reply(self, method: str, path: str) -> tuple[int, dict, bytes]:
+        """Статус, заголовки и тело ответа на запрос, после задержки."""
+        delay, status = self._draw()
+        if delay:
+            time.sleep(delay)
+
+        headers = {"Content-Type": "application/json"}
+        if status == 429:
+            body = b'{"errors": ["Too many requests"]}'
+            headers["Retry-After"] = "0"
+        elif status is not None:
+            body = f"<html><h1>{status} Bad Gateway</h1></html>".encode()
+            headers["Content-Type"] = "text/html"
+        else:
+            url = urlparse(path)
+            status = 200
+            body = self.api.body(method, url.path.strip("/"), dict(parse_qsl(url.query)))
+
+        headers["Content-Length"] = str(len(body))
+        return status, headers, body
+
+    def respond(self, handler: BaseHTTPRequestHandler):
+        length = int(handler.headers.get("Content-Length") or 0)
+        if length:
+            handler.rfile.read(length)
+
+        status, headers, body = self.reply(handler.command, handler.path)
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self) -> FakeServer:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> FakeServer:
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class _H2Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+
+class FakeH2Server(FakeServer):
+    """
+    Тот же API по HTTP/2 без TLS (h2c с prior knowledge): все запросы клиента идут по одному соединению,
+    ответы на потоки отдаются параллельно по мере готовности. Требует h2: pip install h2
+    """
+
+    def _listen(self, host: str, port: int) -> socketserver.TCPServer:
+        try:
+            import h2.config  # noqa: F401
+        except ImportError:
+            raise ImportError("FakeH2Server требует h2: pip install h2")
+
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                server.serve_h2(self.request)
+
+        return _H2Server((host, port), Handler)
+
+    def serve_h2(self, sock: socket.socket):
+        import h2.config
+        import h2.connection
+        import h2.events
+        import h2.exceptions
+
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False, header_encoding="utf-8"))
+        # Одно соединение на всех: потоки ответов пишут в него по очереди и ждут окна flow control.
+        window = threading.Condition()
+        streams = {}
+
+        def flush():
+            data = conn.data_to_send()
+            if data:
+                sock.sendall(data)
+
+        def respond(stream_id: int, headers: dict):
+            status, response_headers, body = self.reply(headers[":method"], headers[":path"])
+            if headers[":method"] == "HEAD":
+                body = b""
+            with window, contextlib.suppress(h2.exceptions.H2Error, OSError):
+                conn.send_headers(stream_id, [(":status", str(status))] +
+                                  [(name.lower(), value) for name, value in response_headers.items()])
+                flush()
+                while body:
+                    size = min(conn.local_flow_control_window(stream_id), conn.max_outbound_frame_size, len(body))
+                    if size <= 0:
+                        window.wait()
+                        continue
+                    conn.send_data(stream_id, body[:size])
+                    body = body[size:]
+                    flush()
+                conn.end_stream(stream_id)
+                flush()
+
+        with window:
+            conn.initiate_connection()
+            flush()
+
+        while True:
+            try:
+                data = sock.recv(65536)
+            except OSError:
+                return
+            if not data:
+                return
+
+            with window:
+                try:
+                    events = conn.receive_data(data)
+                except h2.exceptions.ProtocolError:
+                    flush()
+                    return
+                for event in events:
+                    if isinstance(event, h2.events.RequestReceived):
+                        streams[event.stream_id] = dict(event.headers)
+                    elif isinstance(event, h2.events.DataReceived):
+                        conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                    elif isinstance(event, h2.events.StreamEnded):
+                        threading.Thread(target=respond, args=(event.stream_id, streams.pop(event.stream_id)),
+                                         daemon=True).start()
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        flush()
+                        return
+                window.notify_all()
+                flush()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--per-page", type=int, default=40)
+    parser.add_argument("--http2", action="store_true", help="HTTP/2 без TLS (h2c)")
+    args = parser.parse_args()
+
+    server_class = FakeH2Server if args.http2 else FakeServer
+    server = server_class(args.host, args.port, args.latency, args.jitter, args.error_rate,
+                          api=FakeAPI(per_page=args.per_page))
+    print(f"Fake API: {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
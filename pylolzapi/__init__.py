@@ -1,14 +1,47 @@
 from __future__ import annotations
 
-from . import types
-from . import utils
-from .api.sync import LZTApi
+import importlib
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import types
+    from . import utils
+    from .api.sync import LZTApi
+    from .api.aio import AsyncLZTApi
+    from .api.pool import LZTApiPool
 
 __all__ = (
     'LZTApi',
+    'AsyncLZTApi',
+    'LZTApiPool',
     'types',
     'utils'
 )
 
 __version__ = '0.0.1'
 __api_version__ = '0.1'
+
+# Подмодули импортируются при первом обращении: import pylolzapi не тянет requests, aiohttp и pydantic.
+_lazy = {
+    'LZTApi': ('.api.sync', 'LZTApi'),
+    'AsyncLZTApi': ('.api.aio', 'AsyncLZTApi'),
+    'LZTApiPool': ('.api.pool', 'LZTApiPool'),
+    'types': ('.types', None),
+    'utils': ('.utils', None),
+}
+
+
+def __getattr__(name: str):
+    if name not in _lazy:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name, attr = _lazy[name]
+    module = importlib.import_module(module_name, __name__)
+    value = getattr(module, attr) if attr is not None else module
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
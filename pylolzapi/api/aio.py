@@ -0,0 +1,586 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Iterable
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .base import BaseAPI
+from pylolzapi import types
+from pylolzapi.utils.cache import ResponseCache
+from pylolzapi.utils.decoder import ItemsStream
+from pylolzapi.utils.emailcode import EmailCode, EmailCodePoller
+from pylolzapi.utils.metrics import Metrics
+from pylolzapi.utils.paginate import PageCutoff, aprefetch, has_next_page, timestamp
+from pylolzapi.utils.ratelimit import RateLimiter
+from pylolzapi.utils.retry import CircuitBreaker, RetryPolicy
+from pylolzapi.utils.singleflight import AsyncSingleFlight
+from pylolzapi.utils.watch import MarketWatch
+
+
+async def _connect_start(session, ctx, params):
+    ctx.connect_started = time.perf_counter()
+
+
+async def _connect_end(session, ctx, params):
+    # trace_request_ctx - словарь задержек запроса (или None, если они не записываются).
+    if ctx.trace_request_ctx is not None:
+        ctx.trace_request_ctx["connect"] += time.perf_counter() - ctx.connect_started
+
+
+class AsyncLZTApi(BaseAPI):
+    def __init__(self, token: str = None, client_id: str = None,
+                 client_secret: str = None, scope: list[str] = None,
+                 rate_limiter: RateLimiter | bool = True, cache: ResponseCache | bool = False,
+                 user_id: int = None, decode: str = "model", json_backend: str | Callable[[bytes], Any] = "auto",
+                 retry: RetryPolicy | bool = True, circuit_breaker: CircuitBreaker | bool = False,
+                 coalesce: bool = True, metrics: Metrics | bool = False, limit: int = 100,
+                 limit_per_host: int = 0, keepalive_timeout: float = 30, chunk_size: int = 65536,
+                 timeout: float | tuple[float, float] = (10, 30)):
+        """
+        Асинхронный клиент. Все запросы идут через одну aiohttp сессию с пулом keep-alive соединений.
+        :param limit: Максимум одновременно открытых соединений
+        :param limit_per_host: Максимум соединений на один хост (0 - без ограничения)
+        :param keepalive_timeout: Сколько секунд держать простаивающее соединение
+        :param chunk_size: Размер куска тела ответа при инкрементальном разборе
+        :param timeout: Таймаут (подключение, чтение) или один на оба, секунды. Запрос, упершийся в таймаут,
+        повторяется по retry и считается отказом для circuit_breaker
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncLZTApi требует aiohttp: pip install pylolzapi[async]")
+
+        super(AsyncLZTApi, self).__init__(token, client_id, client_secret, scope, rate_limiter, cache,
+                                          user_id, decode, json_backend, retry, circuit_breaker, coalesce,
+                                          metrics)
+        self._flight = AsyncSingleFlight() if self._coalesce else None
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._chunk_size = chunk_size
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        # Без total: длинные списки грузятся дольше read, ограничено только ожидание каждого куска.
+        self._timeout = aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read)
+        self._session: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._limit, limit_per_host=self._limit_per_host,
+                                             keepalive_timeout=self._keepalive_timeout)
+            trace = aiohttp.TraceConfig()
+            trace.on_connection_create_start.append(_connect_start)
+            trace.on_connection_create_end.append(_connect_end)
+            self._session = aiohttp.ClientSession(headers=self._headers, connector=connector, trace_configs=[trace],
+                                                  timeout=self._timeout)
+
+        return self._session
+
+    async def warm(self):
+        """Открывает соединение с API заранее, например перед покупкой, чтобы она не ждала TCP и TLS."""
+        async with self.session.head(self._base_url):
+            pass
+
+    async def close(self):
+        """Закрывает сессию и все соединения пула."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def __send(self, method: str, url: str, timings: dict = None, **kwargs) -> aiohttp.ClientResponse:
+        retries = self._attempts(method, url)
+
+        for attempt in range(retries + 1):
+            probe = self._breaker.check() if self._breaker is not None else False
+            try:
+                if self._limiter is not None:
+                    await self._limiter.acquire_async(url)
+
+                self._attempt(method, url, attempt)
+                if timings is not None:
+                    timings["connect"] = 0.0
+                started = time.perf_counter()
+                response = await self.session.request(method, self._base_url + url,
+                                                      trace_request_ctx=timings, **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self._record(failed=True)
+                if attempt == retries:
+                    raise
+                await asyncio.sleep(self._retry.delay(attempt))
+                continue
+            except BaseException:
+                # Отмена или ошибка хука: запрос не дошел до API, но пробный запрос нужно отпустить.
+                if probe:
+                    self._breaker.release()
+                raise
+
+            if timings is not None:
+                timings["ttfb"] = max(0.0, time.perf_counter() - started - timings["connect"])
+
+            self._record(failed=response.status >= 500)
+            if attempt == retries or response.status not in self._retry.statuses:
+                return response
+
+            response.release()
+            await asyncio.sleep(self._retry.delay(attempt, response.headers.get("Retry-After")))
+
+    async def __request(self, method: str, url: str, **kwargs) -> dict:
+        timings = self._timings()
+        started = time.perf_counter()
+        try:
+            async with await self.__send(method, url, timings, **kwargs) as response:
+                downloading = time.perf_counter()
+                content = await response.read()
+
+            decoding = time.perf_counter()
+            resp = self._decode_response(content, response.status)
+        except Exception as e:
+            self._failed(method, url, e)
+            raise
+
+        if timings is not None:
+            finished = time.perf_counter()
+            timings["download"] = decoding - downloading
+            timings["decode"] = finished - decoding
+            timings["total"] = finished - started
+        self._completed(method, url, response.status, timings)
+        return resp
+
+    async def _get_stream(self, url: str, params: dict, stream: ItemsStream) -> AsyncIterator[dict]:
+        """
+        GET запрос, записи списка из ответа отдаются по мере загрузки тела.
+        После исчерпания остальные ключи ответа лежат в stream.meta.
+        """
+        timings = self._timings()
+        started = time.perf_counter()
+        try:
+            async with await self.__send('GET', url, timings, params=self._query(params)) as response:
+                downloading = time.perf_counter()
+                try:
+                    async for chunk in response.content.iter_chunked(self._chunk_size):
+                        for record in stream.feed(chunk):
+                            yield record
+                    for record in stream.close():
+                        yield record
+                except ValueError:
+                    raise self._html_error(stream.text, response.status)
+
+            self._check_response(stream.meta)
+        except Exception as e:
+            self._failed('GET', url, e)
+            raise
+
+        if timings is not None:
+            # Тело разбирается по мере загрузки, поэтому decode входит в download.
+            finished = time.perf_counter()
+            timings["download"] = finished - downloading
+            timings["total"] = finished - started
+        self._completed('GET', url, response.status, timings)
+
+    async def _stream_pages(self, url: str, params: Callable[[int], dict],
+                            key: str) -> AsyncIterator[AsyncIterator[dict]]:
+        page = 1
+        while True:
+            stream = ItemsStream(key)
+            records = self._get_stream(url, params(page), stream)
+            try:
+                yield records
+            finally:
+                await records.aclose()
+
+            if not has_next_page(stream.meta, page, key, stream.count):
+                return
+            page += 1
+
+    @staticmethod
+    async def _walk(pages: AsyncIterator, cutoff: PageCutoff) -> AsyncIterator[dict]:
+        """Записи страниц (списков или потоков записей) с учетом отсечки."""
+        try:
+            async for records in pages:
+                cutoff.new_page()
+                if cutoff.done:
+                    return
+                if isinstance(records, list):
+                    for record in records:
+                        if cutoff.accept(record):
+                            yield record
+                        if cutoff.done:
+                            return
+                else:
+                    async for record in records:
+                        if cutoff.accept(record):
+                            yield record
+                        if cutoff.done:
+                            return
+        finally:
+            await pages.aclose()
+
+    @staticmethod
+    def _query(params: dict) -> dict:
+        """aiohttp принимает в query только str/int/float, приводим остальное так же, как это делает requests."""
+        def value(v):
+            if isinstance(v, (list, tuple)):
+                return [value(i) for i in v]
+            if isinstance(v, bool) or not isinstance(v, (str, int, float)):
+                return str(v)
+            return v
+
+        return {k: value(v) for k, v in params.items() if v is not None}
+
+    async def _get(self, url: str, params=None) -> dict:
+        if params is None:
+            params = dict()
+
+        if self.cache is not None:
+            cached = self.cache.get('GET', url, params)
+            if cached is not None:
+                return cached
+
+        async def fetch() -> dict:
+            resp = await self.__request('GET', url, params=self._query(params))
+            if self.cache is not None:
+                self.cache.set('GET', url, params, resp)
+
+            return resp
+
+        if self._flight is None:
+            return await fetch()
+
+        return await self._flight.do(ResponseCache.key('GET', url, params), fetch)
+
+    async def _post(self, url: str, data=None) -> dict:
+        if data is None:
+            data = dict()
+
+        resp = await self.__request('POST', url, data=data)
+        if self.cache is not None:
+            self.cache.on_write(url)
+
+        return resp
+
+    async def _delete(self, url: str, data=None) -> dict:
+        if data is None:
+            data = dict()
+
+        resp = await self.__request('DELETE', url, data=data)
+        if self.cache is not None:
+            self.cache.on_write(url)
+
+        return resp
+
+    @property
+    def user_info(self) -> types.User | None:
+        """Профиль токена после первого вызова me(), иначе None."""
+        return self._user_info
+
+    async def get_user_id(self) -> int:
+        """ID аккаунта токена. Если он не передан в конструктор, загружается через me()."""
+        if self._user_id is None:
+            if self._user_info is None:
+                await self.me()
+            self._user_id = self._user_info.user_id
+
+        return self._user_id
+
+    async def me(self) -> types.User:
+        """Отображает информацию о вашем профиле."""
+        self._user_info = types.User.parse_obj((await self._get("users/me"))["user"])
+        return self._user_info
+
+    async def market_fave(self) -> dict:
+        """Получить свои избранные товары."""
+        return await self._get(f'market/fave')
+
+    async def market_viewed(self) -> [types.Item, dict]:
+        """Получить свои просмотренные товары."""
+        resp = await self._get(f'market/viewed')
+        return self._validate('market/viewed', self._item, resp["items"]), resp
+
+    async def market_item(self, item: int) -> types.Item:
+        """
+        Показывает информацию об аккаунте на маркете.
+        :param item: Item ID
+        """
+        url = f'market/{item}'
+        return self._validate(url, self._item, [await self._get(url)])[0]
+
+    async def market_items(self, items: Iterable[int], concurrency: int = 8) -> list[types.Item | Exception]:
+        """
+        Загружает market_item для нескольких аккаунтов параллельно, с соблюдением лимитов клиента.
+        Ошибка по одному аккаунту не прерывает остальные: на его месте в результате будет исключение.
+        :param items: ID аккаунтов
+        :param concurrency: Сколько запросов выполнять одновременно
+        :return: Результаты в порядке items
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(item: int):
+            async with semaphore:
+                try:
+                    return await self.market_item(item)
+                except Exception as e:
+                    return e
+
+        return list(await asyncio.gather(*(fetch(item) for item in items)))
+
+    async def market_reserve(self, item: int | types.Item, price: int = None) -> dict:
+        """
+        Резервирует аккаунт.
+        :param item: ID аккаунта или уже полученный Item (тогда цена берется из него без лишнего запроса)
+        :param price: Ваша Цена за аккаунт, по умолчанию указанная цена
+        """
+        item, price = self._reserve_target(item, price)
+        price = price if price is not None else (await self.market_item(item)).price
+        return await self._post(f'market/{item}/reserve', data={'price': price})
+
+    async def market_cancel_reserve(self, item: int) -> dict:
+        """
+        Отменяет резерв аккаунта.
+        :param item: ID аккаунта
+        """
+        return await self._post(f'market/{item}/cancel-reserve')
+
+    async def market_check_account(self, item: int) -> dict:
+        """
+        Проверяет аккаунт.
+        :param item: ID аккаунта
+        """
+        return await self._post(f'market/{item}/check-account')
+
+    async def market_confirm_buy(self, item: int) -> dict:
+        """
+        Подтверждение покупки.
+        :param item: ID аккаунта
+        """
+        return await self._post(f'market/{item}/confirm-buy')
+
+    async def market_fast_buy(self, item: int) -> dict:
+        """
+        Автоматическая проверка и покупка аккаунта.
+        :param item: ID аккаунта
+        """
+        return await self._post(f'market/{item}/fast-buy')
+
+    async def market_get_email(self, item: int, email: str):
+        """
+        Получить код подтверждения с почты маркета.
+        :param item: ID аккаунта
+        :param email: Почта аккаунта
+        """
+        return await self._get(f'market/{item}/email-code', params={'email': email})
+
+    async def wait_for_email_code(self, item: int, email: str, timeout: float = 120, since: datetime | int = None,
+                                  initial: float = 1.0, backoff: float = 1.5, max_interval: float = 15) -> EmailCode:
+        """
+        Ждет код подтверждения с почты маркета: опрашивает market_get_email сначала часто, затем все реже.
+        Для нескольких аккаунтов сразу - EmailCodePoller.
+        :param item: ID аккаунта
+        :param email: Почта аккаунта
+        :param timeout: Сколько секунд ждать, потом EmailCodeTimeout
+        :param since: Не принимать коды из писем раньше этой даты (например, времени покупки)
+        :param initial: Первый интервал опроса, секунды
+        :param backoff: Во сколько раз интервал растет после каждого пустого ответа
+        :param max_interval: Максимальный интервал опроса
+        """
+        poller = EmailCodePoller(self, initial=initial, backoff=backoff, max_interval=max_interval)
+        poller.add(item, email, timeout, timestamp(since))
+        result = (await poller.run_async())[(item, email)]
+        if isinstance(result, Exception):
+            raise result
+
+        return result
+
+    async def market_refuse_guarantee(self, item: int) -> dict:
+        """
+        Отказаться от гарантии.
+        :param item: ID Аккаунта
+        """
+        return await self._post(f'market/{item}/refuse-guarantee')
+
+    async def market_change_password(self, item: int) -> dict:
+        """
+        Изменить пароль аккаунта.
+        :param item: ID аккаунта
+        """
+        return await self._post(f'market/{item}/change-password')
+
+    async def market_delete(self, item: int, reason: str):
+        """
+        Удалить свой аккаунт с маркета.
+        :param item: ID аккаунта
+        :param reason: Причина удаления
+        """
+        return await self._delete(f'market/{item}/delete', data={'reason': reason})
+
+    async def market_bump(self, item: int):
+        """
+        Поднять аккаунт.
+        :param item: ID аккаунта
+        """
+        return await self._post(f'market/{item}/bump')
+
+    async def market_payments(self, payment_type: str = None, pmin: int = None, pmax: int = None,
+                              receiver: str = None, sender: str = None, start_date: datetime = None,
+                              end_date: datetime = None, wallet: str = None, comment: str = None,
+                              is_hold: str = None, page: int = None) -> tuple[list[types.Operation], dict]:
+        """
+        Выводит список транзакций на аккаунте. Параметры совпадают с LZTApi.market_payments.
+        """
+        data = self._payments_params(payment_type, pmin, pmax, receiver, sender, start_date, end_date,
+                                     wallet, comment, is_hold, page)
+        url = f'market/user/{await self.get_user_id()}/payments'
+        resp = await self._get(url, params=data)
+
+        return self._validate(url, self._operation, resp["payments"].values()), resp
+
+    async def market_list(self, category: str = None, pmin: int = None, pmax: int = None, title: str = None,
+                          parse_sticky_items: str = None, optional: dict = None,
+                          page: int = None) -> tuple[list[types.Item], dict]:
+        """
+        Получить все последние аккаунты маркета. Параметры совпадают с LZTApi.market_list.
+        """
+        if category:
+            url = f'market/{category}'
+            resp = await self._get(url, params=self._list_params(pmin, pmax, title, parse_sticky_items, optional, page))
+        else:
+            url = 'market'
+            resp = await self._get(url, params={'page': page} if page else None)
+
+        return self._validate(url, self._item, resp["items"]), resp
+
+    async def iter_market_list(self, category: str = None, pmin: int = None, pmax: int = None, title: str = None,
+                               parse_sticky_items: str = None, optional: dict = None, max_items: int = None,
+                               since: datetime | int = None, incremental: bool = False) -> AsyncIterator[types.Item]:
+        """
+        Обходит все страницы market_list и отдает аккаунты по одному. Параметры совпадают с LZTApi.iter_market_list.
+        """
+        url = f'market/{category}' if category else 'market'
+
+        def params(page: int) -> dict:
+            if category:
+                return self._list_params(pmin, pmax, title, parse_sticky_items, optional, page)
+            return {'page': page}
+
+        async def fetch(page: int):
+            resp = await self._get(url, params=params(page))
+            return resp["items"], has_next_page(resp, page, "items")
+
+        pages = self._stream_pages(url, params, "items") if incremental else aprefetch(fetch)
+        records = self._walk(pages, PageCutoff("published_date", since, max_items))
+        try:
+            async for record in records:
+                yield self._validate(url, self._item, [record])[0]
+        finally:
+            await records.aclose()
+
+    def watch(self, category: str = None, pmin: int = None, pmax: int = None, title: str = None,
+              parse_sticky_items: str = None, optional: dict = None, interval: float = 5,
+              min_interval: float = 3, max_interval: float = 30, seen_size: int = 10000,
+              bumps: bool = False, emit_existing: bool = False, ignore_errors: bool = False) -> MarketWatch:
+        """
+        Следит за первой страницей market_list и сообщает о новых аккаунтах и изменениях цены.
+        Использование: `async for event in api.watch(...)` или `await watch.run_async(callback)`.
+        Задержки обнаружения и время опросов в watch.stats.as_dict().
+        Параметры поиска совпадают с market_list.
+        :param interval: Начальный интервал опроса, секунды. Сокращается, пока появляются новые аккаунты
+        :param min_interval: Минимальный интервал опроса
+        :param max_interval: Максимальный интервал опроса
+        :param seen_size: Сколько последних item_id помнить для отсева повторов
+        :param bumps: Сообщать также о поднятых аккаунтах
+        :param emit_existing: Сообщить об аккаунтах первого опроса, а не только появившихся после запуска
+        :param ignore_errors: Продолжать опрос после ошибок запроса
+        """
+        if category:
+            url, params = f'market/{category}', self._list_params(pmin, pmax, title, parse_sticky_items, optional)
+        else:
+            url, params = 'market', None
+
+        return MarketWatch(self, url, params, interval=interval, min_interval=min_interval,
+                           max_interval=max_interval, seen_size=seen_size, bumps=bumps,
+                           emit_existing=emit_existing, ignore_errors=ignore_errors)
+
+    async def iter_market_payments(self, payment_type: str = None, pmin: int = None, pmax: int = None,
+                                   receiver: str = None, sender: str = None, start_date: datetime = None,
+                                   end_date: datetime = None, wallet: str = None, comment: str = None,
+                                   is_hold: str = None, max_items: int = None, since: datetime | int = None,
+                                   incremental: bool = False) -> AsyncIterator[types.Operation]:
+        """
+        Обходит все страницы market_payments и отдает операции по одной.
+        Параметры совпадают с LZTApi.iter_market_payments.
+        """
+        url = f'market/user/{await self.get_user_id()}/payments'
+
+        def params(page: int) -> dict:
+            return self._payments_params(payment_type, pmin, pmax, receiver, sender, start_date, end_date,
+                                         wallet, comment, is_hold, page)
+
+        async def fetch(page: int):
+            resp = await self._get(url, params=params(page))
+            payments = resp["payments"]
+            records = list(payments.values()) if isinstance(payments, dict) else payments
+            return records, has_next_page(resp, page, "payments")
+
+        pages = self._stream_pages(url, params, "payments") if incremental else aprefetch(fetch)
+        records = self._walk(pages, PageCutoff("operation_date", since, max_items, "operation_id"))
+        try:
+            async for record in records:
+                yield self._validate(url, self._operation, [record])[0]
+        finally:
+            await records.aclose()
+
+    async def market_transfer(self, receiver: int, receiver_username: str, amount: int, secret_answer: str,
+                              currency: str = 'rub', comment: str = None, transfer_hold: str = None,
+                              hold_length_value: str = None, hold_length_option: int = None):
+        data = self._transfer_params(receiver, receiver_username, amount, secret_answer, currency, comment,
+                                     transfer_hold, hold_length_value, hold_length_option)
+        return await self._post('market/balance/transfer', data=data)
+
+    async def market_category_params(self, category_name: str):
+        """
+        Отображает параметры поиска для категории
+        :param category_name: Название категории
+        """
+        return await self._get(f'market/{category_name}/params')
+
+    async def market_category_games(self, category_name: str):
+        """
+        Отображает список игр в категории
+        :param category_name: Название категории
+        """
+        return await self._get(f'market/{category_name}/games')
+
+    async def market_add_item(self, title: str, price: int, category_id: int, item_origin: str,
+                              extended_guarantee: int, currency: str = 'rub', title_en: str = None,
+                              description: str = None, information: str = None, has_email_login_data: bool = None,
+                              email_login_data: str = None, email_type: str = None, allow_ask_discount: bool = None,
+                              proxy_id: int = None) -> dict:
+        """
+        Добавляет аккаунт на маркет. Параметры совпадают с LZTApi.market_add_item.
+        """
+        data = self._add_item_params(title, price, category_id, item_origin, extended_guarantee, currency, title_en,
+                                     description, information, has_email_login_data, email_login_data, email_type,
+                                     allow_ask_discount, proxy_id)
+        return await self._post('market/item/add', data=data)
+
+    async def market_add_item_check(self, item: int, login: str = None, password: str = None,
+                                    log_pass: str = None, close_item: bool = None) -> dict:
+        """
+        Проверьте аккаунт на действительность. Если он действителен, аккаунт будет опубликован на маркете.
+        :param item: ID Item
+        :param login: Логин
+        :param password: Пароль
+        :param log_pass: Логин:Пароль
+        :param close_item: Закрыть аккаунт.
+        """
+        data = self._add_item_check_params(login, password, log_pass, close_item)
+        return await self._post(f'market/{item}/goods/check', data=data)
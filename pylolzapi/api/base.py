@@ -1,22 +1,89 @@
+from __future__ import annotations
+
+import time
 import urllib.parse
 
+from datetime import datetime
+from typing import Any, Callable, Iterable
+
+from pylolzapi import types
+from pylolzapi.utils.cache import ResponseCache
+from pylolzapi.utils.decoder import get_loads
+from pylolzapi.utils.exceptions import LolzAPIError, ServerError
+from pylolzapi.utils.metrics import Metrics, collected_timings
+from pylolzapi.utils.ratelimit import RateLimiter
+from pylolzapi.utils.retry import CircuitBreaker, RetryPolicy
+
 
 class BaseAPI:
     def __init__(self, token: str = None, client_id: str = None,
-                 client_secret: str = None, scope: list[str] = None):
+                 client_secret: str = None, scope: list[str] = None,
+                 rate_limiter: RateLimiter | bool = True, cache: ResponseCache | bool = False,
+                 user_id: int = None, decode: str = "model",
+                 json_backend: str | Callable[[bytes], Any] = "auto", retry: RetryPolicy | bool = True,
+                 circuit_breaker: CircuitBreaker | bool = False, coalesce: bool = True,
+                 metrics: Metrics | bool = False):
         """
         https://zelenka.guru/account/api
         :param token: Токен
         :param client_id: Client ID (Временно не работает)
         :param client_secret: Client Secret (Временно не работает)
         :param scope: Разрешения (Временно не работает)
+        :param rate_limiter: RateLimiter (можно общий на несколько клиентов одного токена),
+        True - лимиты API по умолчанию, False - без ограничения
+        :param cache: ResponseCache для me, market_item, market_category_params и market_category_games,
+        True - кэш с настройками по умолчанию, False - без кэша
+        :param user_id: ID своего аккаунта, если известен. Иначе берется из me() при первой необходимости
+        :param decode: model - аккаунты и операции разбираются в pydantic модели Item/Operation,
+        lazy - в ItemView/OperationView, которые приводят поля к типу только при обращении
+        :param json_backend: Чем декодировать ответы: auto (orjson, если установлен), orjson, json или функция
+        :param retry: RetryPolicy для повтора GET запросов при сетевых ошибках, 429 и 5xx,
+        True - настройки по умолчанию, False - без повторов
+        :param circuit_breaker: CircuitBreaker (можно общий на несколько клиентов),
+        True - настройки по умолчанию, False - без него
+        :param coalesce: Объединять одинаковые одновременные GET запросы в один
+        :param metrics: Metrics для счетчиков и задержек запросов по эндпоинтам (можно общий на несколько клиентов),
+        True - новый Metrics, False - без метрик
         """
+        if decode not in ("model", "lazy"):
+            raise ValueError(f"decode должен быть model или lazy, а не {decode!r}")
+
         self.__token = token
         self._client_id = client_id
         self._client_secret = client_secret
         self._scope = "+".join(scope) if scope is not None else ""
         self._base_url = "https://api.zelenka.guru/"
 
+        if rate_limiter is True:
+            rate_limiter = RateLimiter()
+        self._limiter: RateLimiter | None = rate_limiter if rate_limiter is not False else None
+
+        if cache is True:
+            cache = ResponseCache()
+        self.cache: ResponseCache | None = cache if cache is not False else None
+
+        self._user_id = user_id
+        self._user_info = None
+        self._decode = decode
+        self._loads = get_loads(json_backend)
+
+        if retry is True:
+            retry = RetryPolicy()
+        self._retry: RetryPolicy | None = retry if retry is not False else None
+
+        if circuit_breaker is True:
+            circuit_breaker = CircuitBreaker()
+        self._breaker: CircuitBreaker | None = circuit_breaker if circuit_breaker is not False else None
+        self._coalesce = coalesce
+
+        if metrics is True:
+            metrics = Metrics()
+        self.metrics: Metrics | None = metrics if metrics is not False else None
+        # Хуки как в requests: {"request": [...], ...}, каждый вызывается с dict события.
+        self.hooks: dict[str, list[Callable[[dict], Any]]] = {"request": [], "response": [], "error": []}
+        # Модели аккаунтов по категориям, None - общий types.item_models.
+        self.item_models: types.ItemRegistry | None = None
+
     @property
     def _token(self):
         return self.__token
@@ -33,6 +100,231 @@ class BaseAPI:
     def _token(self, token):
         self.__token = token
 
+    @property
+    def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {self._token}"}
+
+    @staticmethod
+    def _html_error(text: str, status: int = None) -> ServerError:
+        """
+        Достает текст ошибки из HTML страницы, которую API (или прокси перед ним) отдает вместо JSON.
+        :param text: Тело ответа
+        :param status: HTTP статус ответа
+        """
+        if '<h1>' in text:
+            return ServerError(text.split('<h1>')[1].split('</h1>')[0], status)
+
+        return ServerError(text.strip()[:200], status)
+
+    def _attempts(self, method: str, url: str) -> int:
+        return self._retry.attempts(method, url) if self._retry is not None else 0
+
+    def _record(self, failed: bool):
+        if self._breaker is not None:
+            if failed:
+                self._breaker.failure()
+            else:
+                self._breaker.success()
+
+    def _emit(self, hook: str, **event):
+        for fn in self.hooks[hook]:
+            fn(event)
+
+    def _timings(self) -> dict | None:
+        """Словарь для задержек запроса, если их кто-то записывает, иначе None."""
+        if (self.metrics is not None and self.metrics.sampled()) or self.hooks["response"] \
+                or collected_timings.get() is not None:
+            return {}
+
+        return None
+
+    def _attempt(self, method: str, url: str, attempt: int):
+        """Перед каждой отправкой запроса, включая повторы."""
+        if attempt and self.metrics is not None:
+            self.metrics.count(method, url, "retries")
+        self._emit("request", method=method, url=url, attempt=attempt)
+
+    def _completed(self, method: str, url: str, status: int, timings: dict | None):
+        if self.metrics is not None:
+            self.metrics.count(method, url, "requests")
+            if timings is not None:
+                self.metrics.observe(method, url, timings)
+        if timings is not None:
+            collected = collected_timings.get()
+            if collected is not None:
+                collected.append(timings)
+        self._emit("response", method=method, url=url, status=status, timings=timings)
+
+    def _failed(self, method: str, url: str, error: Exception):
+        if self.metrics is not None:
+            self.metrics.count(method, url, "requests")
+            self.metrics.count(method, url, "errors")
+        self._emit("error", method=method, url=url, error=error)
+
+    def _decode_response(self, content: bytes, status: int = None) -> dict:
+        """
+        Декодирует тело ответа один раз и проверяет его на ошибки API.
+        :param content: Тело ответа
+        :param status: HTTP статус ответа, ошибки в ответах 5xx поднимаются как ServerError
+        """
+        try:
+            resp_json = self._loads(content)
+        except ValueError:
+            raise self._html_error(content.decode('utf-8', 'replace'), status)
+
+        try:
+            return self._check_response(resp_json)
+        except LolzAPIError as e:
+            if status is not None and status >= 500:
+                raise ServerError(str(e), status) from e
+            raise
+
+    @staticmethod
+    def _check_response(resp_json: dict) -> dict:
+        """
+        Поднимает LolzAPIError, если в ответе API есть ошибка.
+        :param resp_json: Декодированный ответ
+        """
+        if not isinstance(resp_json, dict):
+            return resp_json
+
+        if resp_json.get("errors") or resp_json.get("error"):
+            if resp_json.get("error_description", False) is not False:
+                raise LolzAPIError(resp_json["error_description"])
+            else:
+                raise LolzAPIError(",".join(resp_json["errors"]))
+
+        return resp_json
+
+    def _item(self, raw: dict) -> types.Item | types.ItemView:
+        models = self.item_models if self.item_models is not None else types.item_models
+        if self._decode == "lazy":
+            return models.view(raw)
+
+        return models.parse(raw)
+
+    def _operation(self, raw: dict) -> types.Operation | types.OperationView:
+        if self._decode == "lazy":
+            return types.OperationView(raw)
+
+        return types.Operation.parse_obj(raw)
+
+    def _validate(self, url: str, parse: Callable[[dict], Any], records: Iterable[dict]) -> list:
+        """
+        Разбирает записи ответа в модели и записывает время разбора в метрики фазой validate.
+        :param url: Путь GET запроса, к эндпоинту которого относится разбор
+        :param parse: _item или _operation
+        :param records: Записи ответа
+        """
+        if self.metrics is None or not self.metrics.sampled():
+            return [parse(record) for record in records]
+
+        started = time.perf_counter()
+        parsed = [parse(record) for record in records]
+        self.metrics.observe("GET", url, {"validate": time.perf_counter() - started})
+        return parsed
+
+    @staticmethod
+    def _reserve_target(item: int | types.Item, price: int = None) -> tuple[int, int | None]:
+        """
+        ID аккаунта и цена для резерва. Цена берется из переданного Item, если не указана явно.
+        :param item: ID аккаунта, Item или ItemView
+        :param price: Цена резерва
+        """
+        if isinstance(item, int):
+            return item, price
+
+        return item.item_id, price if price is not None else item.price
+
+    @staticmethod
+    def _payments_params(payment_type: str = None, pmin: int = None, pmax: int = None, receiver: str = None,
+                         sender: str = None, start_date: datetime = None, end_date: datetime = None,
+                         wallet: str = None, comment: str = None, is_hold: str = None, page: int = None) -> dict:
+        data = dict()
+
+        if payment_type: data['type'] = payment_type
+        if pmin: data['pmin'] = pmin
+        if pmax: data['pmax'] = pmax
+        if receiver: data['receiver'] = receiver
+        if sender: data['sender'] = sender
+        if start_date: data['startDate'] = start_date
+        if end_date: data['endDate'] = end_date
+        if wallet: data['wallet'] = wallet
+        if comment: data['comment'] = comment
+        if is_hold: data['is_hold'] = is_hold
+        if page: data['page'] = page
+
+        return data
+
+    @staticmethod
+    def _list_params(pmin: int = None, pmax: int = None, title: str = None,
+                     parse_sticky_items: str = None, optional: dict = None, page: int = None) -> dict:
+        data = dict()
+
+        if title: data['title'] = title
+        if pmin: data['pmin'] = pmin
+        if pmax: data['pmax'] = pmax
+        if parse_sticky_items: data['parse_sticky_items'] = parse_sticky_items
+        if optional: data = {**data, **optional}
+        if page: data['page'] = page
+
+        return data
+
+    @staticmethod
+    def _transfer_params(receiver: int, receiver_username: str, amount: int, secret_answer: str,
+                         currency: str = 'rub', comment: str = None, transfer_hold: str = None,
+                         hold_length_value: str = None, hold_length_option: int = None) -> dict:
+        data = {
+            'user_id': receiver,
+            'username': receiver_username,
+            'amount': amount,
+            'secret_answer': secret_answer,
+            'currency': currency
+        }
+        if comment: data['comment'] = comment
+        if transfer_hold: data['transfer_hold'] = transfer_hold
+        if hold_length_value: data['hold_length_value'] = hold_length_value
+        if hold_length_option: data['hold_length_option'] = hold_length_option
+
+        return data
+
+    @staticmethod
+    def _add_item_params(title: str, price: int, category_id: int, item_origin: str, extended_guarantee: int,
+                         currency: str = 'rub', title_en: str = None, description: str = None,
+                         information: str = None, has_email_login_data: bool = None, email_login_data: str = None,
+                         email_type: str = None, allow_ask_discount: bool = None, proxy_id: int = None) -> dict:
+        data = {
+            'title': title,
+            'price': price,
+            'category_id': category_id,
+            'currency': currency,
+            'item_origin': item_origin,
+            'extended_guarantee': extended_guarantee
+        }
+
+        if title_en: data['title_en'] = title_en
+        if description: data['description'] = description
+        if information: data['information'] = information
+        if has_email_login_data: data['has_email_login_data'] = has_email_login_data
+        if email_login_data: data['email_login_data'] = email_login_data
+        if email_type: data['email_type'] = email_type
+        if allow_ask_discount: data['allow_ask_discount'] = allow_ask_discount
+        if proxy_id: data['proxy_id'] = proxy_id
+
+        return data
+
+    @staticmethod
+    def _add_item_check_params(login: str = None, password: str = None,
+                               log_pass: str = None, close_item: bool = None) -> dict:
+        data = dict()
+
+        if login: data['login'] = login
+        if password: data['password'] = password
+        if log_pass: data['loginpassword'] = log_pass
+        if close_item: data['close_item'] = close_item
+
+        return data
+
     @staticmethod
     def transfer(username: str, amount: int = None, comment: str = None, hold: bool = None):
         """
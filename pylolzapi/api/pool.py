@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Iterator
+
+from .sync import LZTApi
+from pylolzapi import types
+
+# Путь, по которому оценивается загрузка лимитов аккаунта для общих методов.
+_SAMPLE_URLS = {
+    "market_list": "market",
+    "iter_market_list": "market",
+    "market_item": "market/0",
+    "market_items": "market/0",
+    "market_category_params": "market/category/params",
+    "market_category_games": "market/category/games",
+}
+
+
+class LZTApiPool:
+    def __init__(self, tokens: Iterable[str | LZTApi], **kwargs):
+        """
+        Несколько аккаунтов с отдельными сессиями и лимитами. Общие запросы только на чтение
+        (market_list, market_item, market_category_params, ...) уходят на наименее загруженный аккаунт,
+        запросы конкретного аккаунта делаются через pool.account(...).
+        :param tokens: Токены или готовые LZTApi
+        :param kwargs: Параметры LZTApi для токенов. Общий RateLimiter передавать не нужно:
+        у каждого токена свои лимиты, в этом и смысл пула
+        """
+        self.clients: list[LZTApi] = [token if isinstance(token, LZTApi) else LZTApi(token, **kwargs)
+                                      for token in tokens]
+        if not self.clients:
+            raise ValueError("Пулу нужен хотя бы один токен")
+
+        self._in_flight = [0] * len(self.clients)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.clients)
+
+    def __iter__(self) -> Iterator[LZTApi]:
+        return iter(self.clients)
+
+    def __getitem__(self, index: int) -> LZTApi:
+        return self.clients[index]
+
+    def account(self, user_id: int) -> LZTApi:
+        """
+        Клиент аккаунта для его собственных запросов (покупки, платежи, bump, ...).
+        :param user_id: ID аккаунта
+        """
+        for client in self.clients:
+            if client.user_id == user_id:
+                return client
+
+        raise KeyError(f"В пуле нет аккаунта {user_id}")
+
+    def _load(self, index: int, url: str) -> tuple[float, int]:
+        limiter = self.clients[index]._limiter
+        return limiter.delay(url) if limiter is not None else 0.0, self._in_flight[index]
+
+    def _acquire(self, method: str) -> int:
+        url = _SAMPLE_URLS[method]
+        with self._lock:
+            index = min(range(len(self.clients)), key=lambda i: self._load(i, url))
+            self._in_flight[index] += 1
+
+        return index
+
+    def _release(self, index: int):
+        with self._lock:
+            self._in_flight[index] -= 1
+
+    def _call(self, method: str, *args, **kwargs) -> Any:
+        index = self._acquire(method)
+        try:
+            return getattr(self.clients[index], method)(*args, **kwargs)
+        finally:
+            self._release(index)
+
+    def market_list(self, *args, **kwargs) -> tuple[list[types.Item], dict]:
+        """LZTApi.market_list на наименее загруженном аккаунте."""
+        return self._call("market_list", *args, **kwargs)
+
+    def iter_market_list(self, *args, **kwargs) -> Iterator[types.Item]:
+        """LZTApi.iter_market_list, весь обход идет через один аккаунт, выбранный при старте."""
+        index = self._acquire("iter_market_list")
+        try:
+            yield from self.clients[index].iter_market_list(*args, **kwargs)
+        finally:
+            self._release(index)
+
+    def market_item(self, item: int) -> types.Item:
+        """LZTApi.market_item на наименее загруженном аккаунте."""
+        return self._call("market_item", item)
+
+    def market_items(self, items: Iterable[int], concurrency: int = 8) -> list[types.Item | Exception]:
+        """
+        LZTApi.market_items, распределенный по всем аккаунтам пула. Порядок результатов совпадает с items.
+        :param items: ID аккаунтов
+        :param concurrency: Одновременных запросов на каждый аккаунт
+        """
+        items = list(items)
+        results: list[types.Item | Exception] = [None] * len(items)
+
+        def fetch(index: int):
+            with self._lock:
+                self._in_flight[index] += 1
+            try:
+                part = self.clients[index].market_items(items[index::len(self.clients)], concurrency)
+            finally:
+                self._release(index)
+            results[index::len(self.clients)] = part
+
+        with ThreadPoolExecutor(len(self.clients), thread_name_prefix="pylolzapi-pool") as executor:
+            for future in [executor.submit(fetch, index) for index in range(len(self.clients))]:
+                future.result()
+
+        return results
+
+    def market_category_params(self, category_name: str):
+        """LZTApi.market_category_params на наименее загруженном аккаунте."""
+        return self._call("market_category_params", category_name)
+
+    def market_category_games(self, category_name: str):
+        """LZTApi.market_category_games на наименее загруженном аккаунте."""
+        return self._call("market_category_games", category_name)
+
+    def stats(self) -> list[dict]:
+        """Загрузка аккаунтов: запросов в работе и примерное ожидание лимита поиска и аккаунтов."""
+        with self._lock:
+            return [{"in_flight": self._in_flight[index],
+                     "search_delay": self._load(index, "market")[0],
+                     "item_delay": self._load(index, "market/0")[0]}
+                    for index in range(len(self.clients))]
@@ -1,59 +1,338 @@
-import requests
-import json
-import types
+from __future__ import annotations
 
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator
 
 from .base import BaseAPI
-from pylolzapi.utils.exceptions import LolzAPIError
+from .transport import HttpxTransport, RequestsTransport, Transport
+from pylolzapi import types
+from pylolzapi.utils.cache import ResponseCache
+from pylolzapi.utils.decoder import ItemsStream, iter_records
+from pylolzapi.utils.emailcode import EmailCode, EmailCodePoller
+from pylolzapi.utils.metrics import Metrics
+from pylolzapi.utils.paginate import PageCutoff, has_next_page, prefetch, timestamp
+from pylolzapi.utils.ratelimit import RateLimiter
+from pylolzapi.utils.retry import CircuitBreaker, RetryPolicy
+from pylolzapi.utils.singleflight import SingleFlight
+from pylolzapi.utils.watch import MarketWatch
 
 
 class LZTApi(BaseAPI):
     def __init__(self, token: str = None, client_id: str = None,
-                 client_secret: str = None, scope: list[str] = None):
-        super(LZTApi, self).__init__(token, client_id, client_secret, scope)
-        self._session = requests.session()
-        self._session.headers = {"Authorization": f"Bearer {self._token}"}
-
-        self.user_info: types.User = self.me()
-
-    def __request(self, method, *args, **kwargs) -> requests.Response:
-        response = method(*args, **kwargs)
-
+                 client_secret: str = None, scope: list[str] = None,
+                 rate_limiter: RateLimiter | bool = True, cache: ResponseCache | bool = False,
+                 user_id: int = None, decode: str = "model",
+                 json_backend: str | Callable[[bytes], Any] = "auto", retry: RetryPolicy | bool = True,
+                 circuit_breaker: CircuitBreaker | bool = False, coalesce: bool = True,
+                 metrics: Metrics | bool = False, chunk_size: int = 65536,
+                 transport: str | Transport = "requests", pool_size: int = 10, keepalive_expiry: float = None,
+                 workers: int = 8, timeout: float | tuple[float, float] = (10, 30)):
+        """
+        Параметры совпадают с BaseAPI. Один клиент можно использовать из нескольких потоков:
+        соединения, лимиты, кэш и профиль токена общие, поэтому отдельный клиент на поток не нужен.
+        :param chunk_size: Размер куска тела ответа при инкрементальном разборе
+        :param transport: requests - HTTP/1.1 через requests, http2 - HTTP/2 через httpx
+        (одновременные запросы идут по одному соединению), или свой Transport
+        :param pool_size: Сколько соединений держать открытыми, не меньше числа потоков, делающих запросы
+        (для своего Transport не используется)
+        :param keepalive_expiry: Переподключаться, если соединение простаивало дольше, секунды
+        (для своего Transport не используется)
+        :param workers: Потоков во внутреннем пуле для submit() и map()
+        :param timeout: Таймаут запроса (подключение, чтение) или один на оба, секунды. Запрос, упершийся в таймаут,
+        повторяется по retry и считается отказом для circuit_breaker (для своего Transport не используется)
+        """
+        super(LZTApi, self).__init__(token, client_id, client_secret, scope, rate_limiter, cache, user_id, decode,
+                                     json_backend, retry, circuit_breaker, coalesce, metrics)
+        self._chunk_size = chunk_size
+        self._flight = SingleFlight() if self._coalesce else None
+        if transport == "requests":
+            transport = RequestsTransport(pool_maxsize=pool_size, keepalive_expiry=keepalive_expiry, timeout=timeout)
+        elif transport == "http2":
+            transport = HttpxTransport(http2=True, max_keepalive_connections=pool_size,
+                                       keepalive_expiry=30 if keepalive_expiry is None else keepalive_expiry,
+                                       timeout=timeout)
+        elif isinstance(transport, str):
+            raise ValueError(f"transport должен быть requests, http2 или Transport, а не {transport!r}")
+        self._transport: Transport = transport
+        self._transport.update_headers(self._headers)
+        self._session = self._transport.session
+        self._workers = workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_size = 0
+        # Сколько map() и submit() сейчас отправляют задачи в каждый пул, включая замененные большим.
+        self._leases: dict[ThreadPoolExecutor, int] = {}
+        self._lock = threading.Lock()
+        self._me_lock = threading.Lock()
+
+    def close(self):
+        """Останавливает внутренний пул потоков и закрывает соединения транспорта."""
+        with self._lock:
+            executors = {*self._leases, self._executor} - {None}
+            self._executor = None
+            self._leases.clear()
+        for executor in executors:
+            executor.shutdown(wait=True)
+        self._transport.close()
+
+    def warm(self):
+        """Открывает соединение с API заранее, например перед покупкой, чтобы она не ждала TCP и TLS."""
+        self._transport.warm(self._base_url)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _acquire(self, workers: int) -> ThreadPoolExecutor:
+        """Пул не меньше workers потоков. Пока пул не отпущен через _release, он не закрывается."""
+        with self._lock:
+            if self._executor is None or self._executor_size < workers:
+                # Пул не меняет размер: больший заменяет старый. Старый закрывается, когда его отпустят
+                # все map() из других потоков, до этого они продолжают отправлять в него задачи.
+                retired = self._executor
+                self._executor_size = max(workers, self._workers)
+                self._executor = ThreadPoolExecutor(self._executor_size, thread_name_prefix="pylolzapi")
+                if retired is not None and not self._leases.get(retired):
+                    self._leases.pop(retired, None)
+                    retired.shutdown(wait=False)
+
+            self._leases[self._executor] = self._leases.get(self._executor, 0) + 1
+            return self._executor
+
+    def _release(self, executor: ThreadPoolExecutor):
+        with self._lock:
+            if executor not in self._leases:
+                return
+            self._leases[executor] -= 1
+            if not self._leases[executor] and executor is not self._executor:
+                # Отправленные задачи доработают в потоках пула.
+                del self._leases[executor]
+                executor.shutdown(wait=False)
+
+    def _resolve(self, method: str | Callable) -> Callable:
+        return getattr(self, method) if isinstance(method, str) else method
+
+    def submit(self, method: str | Callable, *args, **kwargs) -> Future:
+        """
+        Выполняет метод клиента во внутреннем пуле потоков.
+        Пример: future = api.submit("market_item", 12345); future.result()
+        :param method: Имя метода (market_item) или функция
+        :return: concurrent.futures.Future с результатом
+        """
+        executor = self._acquire(self._workers)
         try:
-            resp_json = response.json()
-        except json.decoder.JSONDecodeError:
-            raise LolzAPIError(response.text.split('<h1>')[1].split('</h1>')[0])
-
-        if resp_json.get("errors") or resp_json.get("error"):
-            if resp_json.get("error_description", False) is not False:
-                raise LolzAPIError(resp_json["error_description"])
-            else:
-                raise LolzAPIError(",".join(resp_json["errors"]))
-
-        return response
+            return executor.submit(self._resolve(method), *args, **kwargs)
+        finally:
+            self._release(executor)
+
+    def map(self, method: str | Callable, args_iter: Iterable, workers: int = None,
+            return_exceptions: bool = False) -> Iterator:
+        """
+        Выполняет метод клиента для каждого набора аргументов во внутреннем пуле, результаты отдает по порядку.
+        Аргументы берутся из args_iter по мере выполнения, поэтому это может быть длинный генератор.
+        Пример: for item in api.map("market_item", item_ids, workers=16): ...
+        :param method: Имя метода (market_item) или функция
+        :param args_iter: Аргументы вызовов: tuple - позиционные, dict - именованные, иначе один аргумент
+        :param workers: Сколько вызовов выполнять одновременно, по умолчанию workers клиента
+        :param return_exceptions: Отдавать исключение на месте результата вместо того, чтобы выбросить его
+        """
+        fn = self._resolve(method)
+        workers = workers or self._workers
+
+        def call(args):
+            if isinstance(args, tuple):
+                return fn(*args)
+            if isinstance(args, dict):
+                return fn(**args)
+            return fn(args)
+
+        pending = deque()
+        args_iter = iter(args_iter)
+        executor = self._acquire(workers)
+        try:
+            while True:
+                for args in args_iter:
+                    pending.append(executor.submit(call, args))
+                    if len(pending) >= workers:
+                        break
+                if not pending:
+                    return
+
+                future = pending.popleft()
+                try:
+                    yield future.result()
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    yield e
+        finally:
+            for future in pending:
+                future.cancel()
+            self._release(executor)
+
+    @property
+    def user_info(self) -> types.User:
+        """Профиль токена, загружается через me() при первом обращении (один раз на все потоки)."""
+        if self._user_info is None:
+            with self._me_lock:
+                if self._user_info is None:
+                    self.me()
+
+        return self._user_info
+
+    @user_info.setter
+    def user_info(self, user_info: types.User):
+        self._user_info = user_info
+
+    @property
+    def user_id(self) -> int:
+        """ID аккаунта токена. Если он не передан в конструктор, загружается через me()."""
+        if self._user_id is None:
+            self._user_id = self.user_info.user_id
+
+        return self._user_id
+
+    def __send(self, method: str, url: str, timings: dict = None, **kwargs):
+        retries = self._attempts(method, url)
+
+        for attempt in range(retries + 1):
+            probe = self._breaker.check() if self._breaker is not None else False
+            try:
+                if self._limiter is not None:
+                    self._limiter.acquire(url)
+
+                self._attempt(method, url, attempt)
+                response = self._transport.request(method, self._base_url + url, timings=timings, **kwargs)
+            except self._transport.errors:
+                self._record(failed=True)
+                if attempt == retries:
+                    raise
+                time.sleep(self._retry.delay(attempt))
+                continue
+            except BaseException:
+                # Ошибка хука или KeyboardInterrupt: запрос не дошел до API, но пробный запрос нужно отпустить.
+                if probe:
+                    self._breaker.release()
+                raise
+
+            self._record(failed=response.status_code >= 500)
+            if attempt == retries or response.status_code not in self._retry.statuses:
+                return response
+
+            response.close()
+            time.sleep(self._retry.delay(attempt, response.headers.get("Retry-After")))
+
+    def __request(self, method: str, url: str, **kwargs) -> dict:
+        timings = self._timings()
+        started = time.perf_counter()
+        try:
+            response = self.__send(method, url, timings, **kwargs)
+            decoding = time.perf_counter()
+            resp = self._decode_response(response.content, response.status_code)
+        except Exception as e:
+            self._failed(method, url, e)
+            raise
+
+        if timings is not None:
+            finished = time.perf_counter()
+            timings["decode"] = finished - decoding
+            timings["total"] = finished - started
+        self._completed(method, url, response.status_code, timings)
+        return resp
+
+    def _get_stream(self, url: str, params: dict, stream: ItemsStream) -> Iterator[dict]:
+        """
+        GET запрос, записи списка из ответа отдаются по мере загрузки тела.
+        После исчерпания остальные ключи ответа лежат в stream.meta.
+        """
+        timings = self._timings()
+        started = time.perf_counter()
+        try:
+            with self.__send('GET', url, timings, params=params, stream=True) as response:
+                downloading = time.perf_counter()
+                try:
+                    yield from iter_records(response.iter_content(self._chunk_size), stream)
+                except ValueError:
+                    raise self._html_error(stream.text, response.status_code)
+
+            self._check_response(stream.meta)
+        except Exception as e:
+            self._failed('GET', url, e)
+            raise
+
+        if timings is not None:
+            # Тело разбирается по мере загрузки, поэтому decode входит в download.
+            finished = time.perf_counter()
+            timings["download"] = finished - downloading
+            timings["total"] = finished - started
+        self._completed('GET', url, response.status_code, timings)
+
+    def _stream_pages(self, url: str, params: Callable[[int], dict], key: str) -> Iterator[Iterator[dict]]:
+        page = 1
+        while True:
+            stream = ItemsStream(key)
+            records = self._get_stream(url, params(page), stream)
+            try:
+                yield records
+            finally:
+                records.close()
+
+            if not has_next_page(stream.meta, page, key, stream.count):
+                return
+            page += 1
 
     def _get(self, url: str, params=None) -> dict:
         if params is None:
             params = dict()
 
-        return self.__request(self._session.get, self._base_url + url, params=params).json()
+        if self.cache is not None:
+            cached = self.cache.get('GET', url, params)
+            if cached is not None:
+                return cached
+
+        def fetch() -> dict:
+            resp = self.__request('GET', url, params=params)
+            if self.cache is not None:
+                self.cache.set('GET', url, params, resp)
+
+            return resp
+
+        if self._flight is None:
+            return fetch()
+
+        return self._flight.do(ResponseCache.key('GET', url, params), fetch)
 
     def _post(self, url: str, data=None) -> dict:
         if data is None:
             data = dict()
 
-        return self.__request(self._session.post, self._base_url + url, data=data).json()
+        resp = self.__request('POST', url, data=data)
+        if self.cache is not None:
+            self.cache.on_write(url)
+
+        return resp
 
     def _delete(self, url: str, data=None) -> dict:
         if data is None:
             data = dict()
 
-        return self.__request(self._session.delete, self._base_url + url, data=data).json()
+        resp = self.__request('DELETE', url, data=data)
+        if self.cache is not None:
+            self.cache.on_write(url)
+
+        return resp
 
     def me(self) -> types.User:
         """Отображает информацию о вашем профиле."""
-        return types.User.parse_obj(self._get("users/me")["user"])
+        self._user_info = types.User.parse_obj(self._get("users/me")["user"])
+        return self._user_info
 
     def market_fave(self) -> dict:
         """Получить свои избранные товары."""
@@ -62,21 +341,44 @@ class LZTApi(BaseAPI):
     def market_viewed(self) -> [types.Item, dict]:
         """Получить свои просмотренные товары."""
         resp = self._get(f'market/viewed')
-        return [types.Item.parse_obj(i) for i in resp["items"]], resp
+        return self._validate('market/viewed', self._item, resp["items"]), resp
 
     def market_item(self, item: int) -> types.Item:
         """
         Показывает информацию об аккаунте на маркете.
         :param item: Item ID
         """
-        return types.Item.parse_obj(self._get(f'market/{item}'))
+        url = f'market/{item}'
+        return self._validate(url, self._item, [self._get(url)])[0]
+
+    def market_items(self, items: Iterable[int], concurrency: int = 8) -> list[types.Item | Exception]:
+        """
+        Загружает market_item для нескольких аккаунтов параллельно, с соблюдением лимитов клиента.
+        Ошибка по одному аккаунту не прерывает остальные: на его месте в результате будет исключение.
+        :param items: ID аккаунтов
+        :param concurrency: Сколько запросов выполнять одновременно
+        :return: Результаты в порядке items
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        def fetch(item: int):
+            try:
+                return self.market_item(item)
+            except Exception as e:
+                return e
 
-    def market_reserve(self, item: int, price: int = None) -> dict:
+        with ThreadPoolExecutor(min(concurrency, len(items)), thread_name_prefix="pylolzapi-items") as executor:
+            return list(executor.map(fetch, items))
+
+    def market_reserve(self, item: int | types.Item, price: int = None) -> dict:
         """
         Резервирует аккаунт.
-        :param item: ID аккаунта
+        :param item: ID аккаунта или уже полученный Item (тогда цена берется из него без лишнего запроса)
         :param price: Ваша Цена за аккаунт, по умолчанию указанная цена
         """
+        item, price = self._reserve_target(item, price)
         price = price if price is not None else (self.market_item(item)).price
         return self._post(f'market/{item}/reserve', data={'price': price})
 
@@ -116,6 +418,27 @@ class LZTApi(BaseAPI):
         """
         return self._get(f'market/{item}/email-code', params={'email': email})
 
+    def wait_for_email_code(self, item: int, email: str, timeout: float = 120, since: datetime | int = None,
+                            initial: float = 1.0, backoff: float = 1.5, max_interval: float = 15) -> EmailCode:
+        """
+        Ждет код подтверждения с почты маркета: опрашивает market_get_email сначала часто, затем все реже.
+        Для нескольких аккаунтов сразу - EmailCodePoller.
+        :param item: ID аккаунта
+        :param email: Почта аккаунта
+        :param timeout: Сколько секунд ждать, потом EmailCodeTimeout
+        :param since: Не принимать коды из писем раньше этой даты (например, времени покупки)
+        :param initial: Первый интервал опроса, секунды
+        :param backoff: Во сколько раз интервал растет после каждого пустого ответа
+        :param max_interval: Максимальный интервал опроса
+        """
+        poller = EmailCodePoller(self, initial=initial, backoff=backoff, max_interval=max_interval)
+        poller.add(item, email, timeout, timestamp(since))
+        result = (poller.run())[(item, email)]
+        if isinstance(result, Exception):
+            raise result
+
+        return result
+
     def market_refuse_guarantee(self, item: int) -> dict:
         """
         Отказаться от гарантии.
@@ -147,7 +470,8 @@ class LZTApi(BaseAPI):
 
     def market_payments(self, payment_type: str = None, pmin: int = None, pmax: int = None, receiver: str = None,
                         sender: str = None, start_date: datetime = None, end_date: datetime = None, wallet: str = None,
-                        comment: str = None, is_hold: str = None) -> tuple[list[types.Operation], dict]:
+                        comment: str = None, is_hold: str = None,
+                        page: int = None) -> tuple[list[types.Operation], dict]:
         """
         Выводит список транзакций на аккаунте.
         :param payment_type: Тип операции. Разрешенные типы операций: income, cost, refilled_balance,
@@ -161,26 +485,18 @@ class LZTApi(BaseAPI):
         :param wallet: Кошелек, который используется для денежных выплат
         :param comment: Комментарий для денежных переводов
         :param is_hold: Отображение операций удержания
+        :param page: Номер страницы
         """
-        data = dict()
-
-        if payment_type: data['type'] = payment_type
-        if pmin: data['pmin'] = pmin
-        if pmax: data['pmax'] = pmax
-        if receiver: data['receiver'] = receiver
-        if sender: data['sender'] = sender
-        if start_date: data['startDate'] = start_date
-        if end_date: data['endDate'] = end_date
-        if wallet: data['wallet'] = wallet
-        if comment: data['comment'] = comment
-        if is_hold: data['is_hold'] = is_hold
-
-        resp = self._get(f'market/user/{self.user_info.user_id}/payments', params=data)
+        data = self._payments_params(payment_type, pmin, pmax, receiver, sender, start_date, end_date,
+                                     wallet, comment, is_hold, page)
+        url = f'market/user/{self.user_id}/payments'
+        resp = self._get(url, params=data)
 
-        return [types.Operation.parse_obj(resp["payments"][operation]) for operation in resp["payments"]], resp
+        return self._validate(url, self._operation, resp["payments"].values()), resp
 
     def market_list(self, category: str = None, pmin: int = None, pmax: int = None, title: str = None,
-                    parse_sticky_items: str = None, optional: dict = None) -> tuple[list[types.Item], dict]:
+                    parse_sticky_items: str = None, optional: dict = None,
+                    page: int = None) -> tuple[list[types.Item], dict]:
         """
         Получить все последние аккаунты маркета.
         :param category: Категория на маркете
@@ -189,37 +505,113 @@ class LZTApi(BaseAPI):
         :param title: Название аккаунта
         :param parse_sticky_items: Условие для разбора параметров
         :param optional: Получить параметры URL-адреса из market
+        :param page: Номер страницы
         """
         if category:
-            data = dict()
-
-            if title: data['title'] = title
-            if pmin: data['pmin'] = pmin
-            if pmax: data['pmax'] = pmax
-            if parse_sticky_items: data['parse_sticky_items'] = parse_sticky_items
-            if optional: data = {**data, **optional}
-
-            resp = self._get(f'market/{category}', params=data)
+            url = f'market/{category}'
+            resp = self._get(url, params=self._list_params(pmin, pmax, title, parse_sticky_items, optional, page))
         else:
-            resp = self._get('market')
-
-        return [types.Item.parse_obj(i) for i in resp["items"]], resp
+            url = 'market'
+            resp = self._get(url, params={'page': page} if page else None)
+
+        return self._validate(url, self._item, resp["items"]), resp
+
+    def iter_market_list(self, category: str = None, pmin: int = None, pmax: int = None, title: str = None,
+                         parse_sticky_items: str = None, optional: dict = None, max_items: int = None,
+                         since: datetime | int = None, incremental: bool = False) -> Iterator[types.Item]:
+        """
+        Обходит все страницы market_list и отдает аккаунты по одному.
+        Следующая страница загружается в фоне, пока обрабатывается текущая.
+        Параметры поиска совпадают с market_list.
+        :param max_items: Остановиться после стольких аккаунтов
+        :param since: Остановиться на первом аккаунте, опубликованном раньше этой даты
+        (при сортировке по дате публикации, как по умолчанию)
+        :param incremental: Разбирать аккаунты по мере загрузки страницы, не дожидаясь всего тела ответа
+        (страницы тогда грузятся последовательно)
+        """
+        url = f'market/{category}' if category else 'market'
+
+        def params(page: int) -> dict:
+            if category:
+                return self._list_params(pmin, pmax, title, parse_sticky_items, optional, page)
+            return {'page': page}
+
+        def fetch(page: int):
+            resp = self._get(url, params=params(page))
+            return resp["items"], has_next_page(resp, page, "items")
+
+        cutoff = PageCutoff("published_date", since, max_items)
+        pages = self._stream_pages(url, params, "items") if incremental else prefetch(fetch)
+        with closing(pages):
+            for records in pages:
+                yield from self._validate(url, self._item, cutoff.filter(records))
+                if cutoff.done:
+                    return
+
+    def watch(self, category: str = None, pmin: int = None, pmax: int = None, title: str = None,
+              parse_sticky_items: str = None, optional: dict = None, interval: float = 5,
+              min_interval: float = 3, max_interval: float = 30, seen_size: int = 10000,
+              bumps: bool = False, emit_existing: bool = False, ignore_errors: bool = False) -> MarketWatch:
+        """
+        Следит за первой страницей market_list и сообщает о новых аккаунтах и изменениях цены.
+        Использование: `for event in api.watch(...)` или `watch.run(callback)`.
+        Задержки обнаружения и время опросов в watch.stats.as_dict().
+        Параметры поиска совпадают с market_list.
+        :param interval: Начальный интервал опроса, секунды. Сокращается, пока появляются новые аккаунты
+        :param min_interval: Минимальный интервал опроса
+        :param max_interval: Максимальный интервал опроса
+        :param seen_size: Сколько последних item_id помнить для отсева повторов
+        :param bumps: Сообщать также о поднятых аккаунтах
+        :param emit_existing: Сообщить об аккаунтах первого опроса, а не только появившихся после запуска
+        :param ignore_errors: Продолжать опрос после ошибок запроса
+        """
+        if category:
+            url, params = f'market/{category}', self._list_params(pmin, pmax, title, parse_sticky_items, optional)
+        else:
+            url, params = 'market', None
+
+        return MarketWatch(self, url, params, interval=interval, min_interval=min_interval,
+                           max_interval=max_interval, seen_size=seen_size, bumps=bumps,
+                           emit_existing=emit_existing, ignore_errors=ignore_errors)
+
+    def iter_market_payments(self, payment_type: str = None, pmin: int = None, pmax: int = None,
+                             receiver: str = None, sender: str = None, start_date: datetime = None,
+                             end_date: datetime = None, wallet: str = None, comment: str = None,
+                             is_hold: str = None, max_items: int = None, since: datetime | int = None,
+                             incremental: bool = False) -> Iterator[types.Operation]:
+        """
+        Обходит все страницы market_payments и отдает операции по одной, от новых к старым.
+        Следующая страница загружается в фоне, пока обрабатывается текущая.
+        Параметры фильтра совпадают с market_payments.
+        :param max_items: Остановиться после стольких операций
+        :param since: Остановиться на первой операции старше этой даты
+        :param incremental: Разбирать операции по мере загрузки страницы (страницы тогда грузятся последовательно)
+        """
+        url = f'market/user/{self.user_id}/payments'
+
+        def params(page: int) -> dict:
+            return self._payments_params(payment_type, pmin, pmax, receiver, sender, start_date, end_date,
+                                         wallet, comment, is_hold, page)
+
+        def fetch(page: int):
+            resp = self._get(url, params=params(page))
+            payments = resp["payments"]
+            records = list(payments.values()) if isinstance(payments, dict) else payments
+            return records, has_next_page(resp, page, "payments")
+
+        cutoff = PageCutoff("operation_date", since, max_items, "operation_id")
+        pages = self._stream_pages(url, params, "payments") if incremental else prefetch(fetch)
+        with closing(pages):
+            for records in pages:
+                yield from self._validate(url, self._operation, cutoff.filter(records))
+                if cutoff.done:
+                    return
 
     def market_transfer(self, receiver: int, receiver_username: str, amount: int, secret_answer: str,
                         currency: str = 'rub', comment: str = None, transfer_hold: str = None,
                         hold_length_value: str = None, hold_length_option: int = None):
-        data = {
-            'user_id': receiver,
-            'username': receiver_username,
-            'amount': amount,
-            'secret_answer': secret_answer,
-            'currency': currency
-        }
-        if comment: data['comment'] = comment
-        if transfer_hold: data['transfer_hold'] = transfer_hold
-        if hold_length_value: data['hold_length_value'] = hold_length_value
-        if hold_length_option: data['hold_length_option'] = hold_length_option
-
+        data = self._transfer_params(receiver, receiver_username, amount, secret_answer, currency, comment,
+                                     transfer_hold, hold_length_value, hold_length_option)
         return self._post('market/balance/transfer', data=data)
 
     def market_category_params(self, category_name: str):
@@ -257,25 +649,9 @@ class LZTApi(BaseAPI):
         :param allow_ask_discount: разрешить запрашивать скидку для пользователей.
         :param proxy_id: идентификатор прокси-сервера
         """
-
-        data = {
-            'title': title,
-            'price': price,
-            'category_id': category_id,
-            'currency': currency,
-            'item_origin': item_origin,
-            'extended_guarantee': extended_guarantee
-        }
-
-        if title_en: data['title_en'] = title_en
-        if description: data['description'] = description
-        if information: data['information'] = information
-        if has_email_login_data: data['has_email_login_data'] = has_email_login_data
-        if email_login_data: data['email_login_data'] = email_login_data
-        if email_type: data['email_type'] = email_type
-        if allow_ask_discount: data['allow_ask_discount'] = allow_ask_discount
-        if proxy_id: data['proxy_id'] = proxy_id
-
+        data = self._add_item_params(title, price, category_id, item_origin, extended_guarantee, currency, title_en,
+                                     description, information, has_email_login_data, email_login_data, email_type,
+                                     allow_ask_discount, proxy_id)
         return self._post('market/item/add', data=data)
 
     def market_add_item_check(self, item: int, login: str = None, password: str = None,
@@ -288,11 +664,5 @@ class LZTApi(BaseAPI):
         :param log_pass: Логин:Пароль
         :param close_item: Закрыть аккаунт.
         """
-        data = dict()
-
-        if login: data['login'] = login
-        if password: data['password'] = password
-        if log_pass: data['loginpassword'] = log_pass
-        if close_item: data['close_item'] = close_item
-
+        data = self._add_item_check_params(login, password, log_pass, close_item)
         return self._post(f'market/{item}/goods/check', data=data)
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import requests
+import threading
+import time
+import urllib3
+
+from typing import Iterator
+
+# Время установки соединений в текущем запросе потока, его заполняют соединения _TimingAdapter.
+_connect = threading.local()
+
+
+def _timed(connection: type) -> type:
+    class TimedConnection(connection):
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                super().connect()
+            finally:
+                _connect.seconds = getattr(_connect, 'seconds', 0.0) + time.perf_counter() - started
+
+    return TimedConnection
+
+
+class _ExpiringPool:
+    """Пул, который не отдает соединения, простоявшие дольше keepalive_expiry: сервер мог их уже закрыть."""
+    keepalive_expiry: float | None = None
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        idle_since = getattr(conn, "_idle_since", None)
+        if self.keepalive_expiry is not None and idle_since is not None \
+                and time.monotonic() - idle_since > self.keepalive_expiry:
+            # Закрытое соединение переподключится при следующем запросе.
+            conn.close()
+
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn._idle_since = time.monotonic()
+        super()._put_conn(conn)
+
+
+class _TimedHTTPConnectionPool(_ExpiringPool, urllib3.HTTPConnectionPool):
+    ConnectionCls = _timed(urllib3.connection.HTTPConnection)
+
+
+class _TimedHTTPSConnectionPool(_ExpiringPool, urllib3.HTTPSConnectionPool):
+    ConnectionCls = _timed(urllib3.connection.HTTPSConnection)
+
+
+class _TimingAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter, соединения которого замеряют время connect (TCP и TLS)."""
+
+    def __init__(self, *args, keepalive_expiry: float = None, **kwargs):
+        self._pools = {
+            'http': type('HTTPConnectionPool', (_TimedHTTPConnectionPool,), {'keepalive_expiry': keepalive_expiry}),
+            'https': type('HTTPSConnectionPool', (_TimedHTTPSConnectionPool,), {'keepalive_expiry': keepalive_expiry}),
+        }
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pools
+
+
+class Transport:
+    """
+    Отправка HTTP запросов для LZTApi. request() возвращает ответ с status_code, headers, content,
+    iter_content(size) и close(), который можно использовать как контекстный менеджер.
+    Ошибки соединения - исключения из errors, их LZTApi повторяет по RetryPolicy.
+    """
+    errors: tuple[type[Exception], ...] = ()
+    session = None
+
+    def update_headers(self, headers: dict):
+        self.session.headers.update(headers)
+
+    def request(self, method: str, url: str, params: dict = None, data: dict = None, stream: bool = False,
+                timings: dict = None):
+        """
+        :param stream: Не загружать тело сразу, оно читается через iter_content
+        :param timings: Словарь для задержек connect, ttfb и download, секунды
+        """
+        raise NotImplementedError
+
+    def warm(self, url: str):
+        """Открывает соединение с хостом заранее, чтобы следующий запрос не ждал TCP и TLS."""
+        self.session.head(url).close()
+
+    def close(self):
+        self.session.close()
+
+
+class RequestsTransport(Transport):
+    errors = (requests.RequestException,)
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+                 keepalive_expiry: float = None, timeout: float | tuple[float, float] = (10, 30)):
+        """
+        HTTP/1.1 через requests.Session с keep-alive. Один транспорт можно использовать из нескольких потоков.
+        :param pool_connections: Сколько хостов держать в пуле
+        :param pool_maxsize: Сколько соединений держать на хост (потоков, одновременно делающих запросы)
+        :param pool_block: Ждать свободное соединение вместо открытия лишнего, которое закроется после запроса
+        :param keepalive_expiry: Переподключаться, если соединение простаивало дольше, секунды (None - не ограничено)
+        :param timeout: Таймаут (подключение, чтение) или один на оба, секунды. requests.Timeout повторяется
+        по RetryPolicy, как остальные сетевые ошибки
+        """
+        self.timeout = timeout
+        self.session = requests.session()
+        for prefix in ('https://', 'http://'):
+            self.session.mount(prefix, _TimingAdapter(pool_connections, pool_maxsize, pool_block=pool_block,
+                                                      keepalive_expiry=keepalive_expiry))
+
+    def request(self, method: str, url: str, params: dict = None, data: dict = None, stream: bool = False,
+                timings: dict = None) -> requests.Response:
+        _connect.seconds = 0.0
+        started = time.perf_counter()
+        response = self.session.request(method, url, params=params, data=data, stream=stream, timeout=self.timeout)
+
+        if timings is not None:
+            # elapsed - от отправки до разбора заголовков, без загрузки тела.
+            headers = response.elapsed.total_seconds()
+            timings["connect"] = _connect.seconds
+            timings["ttfb"] = max(0.0, headers - _connect.seconds)
+            timings["download"] = max(0.0, time.perf_counter() - started - headers)
+
+        return response
+
+    def warm(self, url: str):
+        self.session.head(url, timeout=self.timeout).close()
+
+
+class _HttpxResponse:
+    __slots__ = ("_response",)
+
+    def __init__(self, response):
+        self._response = response
+
+    @property
+    def status_code(self) -> int:
+        return self._response.status_code
+
+    @property
+    def headers(self):
+        return self._response.headers
+
+    @property
+    def content(self) -> bytes:
+        return self._response.read()
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        return self._response.iter_bytes(chunk_size)
+
+    def close(self):
+        self._response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class HttpxTransport(Transport):
+    def __init__(self, http2: bool = True, http1: bool = True, max_connections: int = 100,
+                 max_keepalive_connections: int = 20, keepalive_expiry: float = 30,
+                 timeout: float | tuple[float, float] = 30):
+        """
+        Транспорт на httpx. С http2 все одновременные запросы к API идут по одному соединению.
+        Требует httpx[http2]: pip install pylolzapi[http2]
+        :param http2: Использовать HTTP/2 (по TLS согласуется через ALPN)
+        :param http1: Разрешить HTTP/1.1. http1=False, http2=True - HTTP/2 без TLS (h2c) для локальных серверов
+        :param max_connections: Максимум соединений
+        :param max_keepalive_connections: Сколько простаивающих соединений держать
+        :param keepalive_expiry: Сколько секунд держать простаивающее соединение
+        :param timeout: Таймаут (подключение, чтение) или один на все, секунды
+        """
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("HttpxTransport требует httpx: pip install pylolzapi[http2]")
+
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections,
+                              keepalive_expiry=keepalive_expiry)
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        self.session = httpx.Client(http1=http1, http2=http2, limits=limits, timeout=timeout)
+        self.errors = (httpx.TransportError,)
+        self._sending = threading.Lock()
+
+    def request(self, method: str, url: str, params: dict = None, data: dict = None, stream: bool = False,
+                timings: dict = None) -> _HttpxResponse:
+        # httpcore выдает ID потока HTTP/2 и отправляет его заголовки без общей блокировки, и из разных потоков
+        # заголовки уходят не по порядку ID - сервер закрывает соединение. Отправка заголовков идет по очереди,
+        # ответы по-прежнему ждутся параллельно.
+        self._sending.acquire()
+        sending = [True]
+
+        def release():
+            if sending[0]:
+                sending[0] = False
+                self._sending.release()
+
+        marks = {}
+
+        def trace(event: str, info: dict):
+            if event in ("http2.send_request_headers.complete", "http11.send_request_headers.complete"):
+                release()
+            elif timings is not None and event.startswith(("connection.connect_tcp.", "connection.start_tls.")):
+                name, _, stage = event.rpartition(".")
+                if stage == "started":
+                    marks[name] = time.perf_counter()
+                elif stage == "complete" and name in marks:
+                    timings["connect"] += time.perf_counter() - marks.pop(name)
+
+        if timings is not None:
+            timings["connect"] = 0.0
+
+        started = time.perf_counter()
+        try:
+            request = self.session.build_request(method, url, params=params, data=data, extensions={"trace": trace})
+            response = self.session.send(request, stream=True)
+        finally:
+            release()
+        if timings is not None:
+            timings["ttfb"] = max(0.0, time.perf_counter() - started - timings["connect"])
+
+        if not stream:
+            downloading = time.perf_counter()
+            try:
+                response.read()
+            finally:
+                response.close()
+            if timings is not None:
+                timings["download"] = time.perf_counter() - downloading
+
+        return _HttpxResponse(response)
@@ -1,14 +1,57 @@
-from .categories import MarketCategories
-from .items import Item
-from .payment import Operation
-from .scope import Scope
-from .user import User
+from __future__ import annotations
+
+import importlib
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .categories import MarketCategories
+    from .items import Item, TelegramItem, WarThunderItem
+    from .lazy import ItemView, OperationView
+    from .payment import Operation
+    from .registry import ItemRegistry, item_models
+    from .scope import Scope
+    from .user import User
 
 
 __all__ = (
     "MarketCategories",
     "User",
     "Item",
+    "WarThunderItem",
+    "TelegramItem",
+    "ItemRegistry",
+    "item_models",
     "Operation",
-    "Scope"
+    "Scope",
+    "ItemView",
+    "OperationView"
 )
+
+# Модели на pydantic импортируются при первом обращении к ним.
+_lazy = {
+    "MarketCategories": ".categories",
+    "User": ".user",
+    "Item": ".items",
+    "WarThunderItem": ".items",
+    "TelegramItem": ".items",
+    "ItemRegistry": ".registry",
+    "item_models": ".registry",
+    "Operation": ".payment",
+    "Scope": ".scope",
+    "ItemView": ".lazy",
+    "OperationView": ".lazy",
+}
+
+
+def __getattr__(name: str):
+    if name not in _lazy:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_lazy[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
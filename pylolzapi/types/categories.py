@@ -20,3 +20,29 @@ class MarketCategories:
     Cinema: int = 23
     Telegram: int = 24
     YouTube: int = 25
+
+
+# Категория в пути запроса к маркету: market/{путь}.
+CATEGORY_PATHS = {
+    MarketCategories.Steam: "steam",
+    MarketCategories.VK: "vkontakte",
+    MarketCategories.Origin: "origin",
+    MarketCategories.Warface: "warface",
+    MarketCategories.Uplay: "uplay",
+    MarketCategories.SocialClub: "socialclub",
+    MarketCategories.Fortnite: "fortnite",
+    MarketCategories.Instagram: "instagram",
+    MarketCategories.Battlenet: "battlenet",
+    MarketCategories.EpicGames: "epicgames",
+    MarketCategories.WoT: "world-of-tanks",
+    MarketCategories.Supercell: "supercell",
+    MarketCategories.WoTBlitz: "wot-blitz",
+    MarketCategories.GenshinImpact: "genshin-impact",
+    MarketCategories.Tarkov: "escape-from-tarkov",
+    MarketCategories.VPN: "vpn",
+    MarketCategories.TikTok: "tiktok",
+    MarketCategories.Discord: "discord",
+    MarketCategories.Cinema: "cinema",
+    MarketCategories.Telegram: "telegram",
+    MarketCategories.YouTube: "youtube",
+}
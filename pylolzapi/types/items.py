@@ -82,7 +82,7 @@ class WarThunderItem(Item):
     wt_exp: int | None
     wt_rank: int | None
     wt_eliteUnits: int | None
-    wt_premium: int
+    wt_premium: int | None
     wt_gold: int | None
     wt_silver: int | None
     wt_win_count_percents: int | None
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+from .items import Item
+from .payment import Operation
+
+
+def _scalar(kind: type):
+    def convert(value):
+        if value is None or type(value) is kind:
+            return value
+        return kind(value)
+
+    return convert
+
+
+def _nested(model: type[BaseModel]):
+    def convert(value):
+        if isinstance(value, dict):
+            return view_class(model)(value)
+        return value
+
+    return convert
+
+
+def _identity(value):
+    return value
+
+
+class _Field:
+    __slots__ = ("name", "convert")
+
+    def __init__(self, name: str, convert):
+        self.name = name
+        self.convert = convert
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return self.convert(instance._raw.get(self.name))
+
+
+class LazyView:
+    """
+    Представление ответа API только для чтения с атрибутами как у модели.
+    Поля приводятся к типу при обращении, validate() возвращает полную pydantic модель.
+    """
+    __slots__ = ("_raw",)
+    __model__: type[BaseModel] = None
+
+    def __init__(self, raw: dict):
+        object.__setattr__(self, "_raw", raw)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} доступен только для чтения")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} доступен только для чтения")
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._raw!r})"
+
+    def __eq__(self, other):
+        if isinstance(other, LazyView):
+            return self.__model__ is other.__model__ and self._raw == other._raw
+        return NotImplemented
+
+    @property
+    def raw(self) -> dict:
+        """Исходный словарь ответа."""
+        return self._raw
+
+    def validate(self) -> BaseModel:
+        """Полная валидация в pydantic модель."""
+        return self.__model__.parse_obj(self._raw)
+
+
+_views: dict[type[BaseModel], type[LazyView]] = {}
+
+
+def view_class(model: type[BaseModel]) -> type[LazyView]:
+    """
+    Класс представления для pydantic модели, создается один раз на модель.
+    :param model: Модель, например types.Item
+    """
+    view = _views.get(model)
+    if view is not None:
+        return view
+
+    namespace = {"__slots__": (), "__model__": model}
+    for name, field in model.__fields__.items():
+        kind = field.type_
+        if isinstance(kind, type) and issubclass(kind, BaseModel):
+            convert = _nested(kind)
+        elif kind in (int, str, bool, float) and field.outer_type_ is kind:
+            convert = _scalar(kind)
+        else:
+            convert = _identity
+        namespace[name] = _Field(field.alias, convert)
+
+    view = _views[model] = type(f"{model.__name__}View", (LazyView,), namespace)
+    return view
+
+
+ItemView = view_class(Item)
+OperationView = view_class(Operation)
+
+
+__all__ = (
+    "LazyView",
+    "ItemView",
+    "OperationView",
+    "view_class"
+)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from typing import Callable
+
+from pydantic import ValidationError
+
+from .categories import MarketCategories
+from .items import Item, TelegramItem
+from .lazy import LazyView, view_class
+
+
+class ItemRegistry:
+    def __init__(self, default: type[Item] = Item, models: dict[int, type[Item]] = None):
+        """
+        Модели аккаунтов по категориям: market_list и market_item сразу разбирают аккаунт
+        в модель его категории, а не в общий Item.
+        :param default: Модель для категорий без своей модели
+        :param models: {category_id: модель}, например {MarketCategories.Telegram: TelegramItem}
+        """
+        self.default = default
+        self._models: dict[int, type[Item]] = dict(models or {})
+        # Разбор и класс представления для каждой категории, заполняются при первом аккаунте категории.
+        self._parsers: dict[int | None, Callable[[dict], Item]] = {}
+        self._views: dict[int | None, type[LazyView]] = {}
+
+    def register(self, category_id: int, model: type[Item] = None):
+        """
+        Регистрирует модель категории. Можно использовать как декоратор:
+
+            @item_models.register(MarketCategories.Steam)
+            class SteamItem(Item):
+                steam_id: str | None
+
+        :param category_id: ID категории (MarketCategories)
+        :param model: Наследник Item
+        """
+        if model is None:
+            def decorator(cls: type[Item]) -> type[Item]:
+                self.register(category_id, cls)
+                return cls
+
+            return decorator
+
+        if not (isinstance(model, type) and issubclass(model, Item)):
+            raise TypeError(f"Модель категории должна наследовать Item, а не {model!r}")
+
+        self._models[category_id] = model
+        self._parsers.pop(category_id, None)
+        self._views.pop(category_id, None)
+        return model
+
+    def unregister(self, category_id: int):
+        self._models.pop(category_id, None)
+        self._parsers.pop(category_id, None)
+        self._views.pop(category_id, None)
+
+    def model(self, category_id: int | None) -> type[Item]:
+        """Модель категории, для незарегистрированных - default."""
+        return self._models.get(category_id, self.default)
+
+    def _parser(self, category_id: int | None) -> Callable[[dict], Item]:
+        model = self.model(category_id)
+        if model is self.default:
+            return model.parse_obj
+
+        def parse(raw: dict) -> Item:
+            # Аккаунт, который не подходит модели категории, не должен ронять весь market_list.
+            try:
+                return model.parse_obj(raw)
+            except ValidationError:
+                return self.default.parse_obj(raw)
+
+        return parse
+
+    def parse(self, raw: dict) -> Item:
+        """Аккаунт из ответа API в модель его категории, а если он ей не подходит - в default."""
+        category_id = raw.get("category_id")
+        try:
+            parse = self._parsers[category_id]
+        except KeyError:
+            parse = self._parsers[category_id] = self._parser(category_id)
+
+        return parse(raw)
+
+    def view(self, raw: dict) -> LazyView:
+        """Аккаунт из ответа API в ленивое представление модели его категории."""
+        category_id = raw.get("category_id")
+        try:
+            view = self._views[category_id]
+        except KeyError:
+            view = self._views[category_id] = view_class(self.model(category_id))
+
+        return view(raw)
+
+
+# Общий реестр всех клиентов, в него же регистрируются свои модели.
+item_models = ItemRegistry(models={
+    MarketCategories.Telegram: TelegramItem,
+})
+
+
+__all__ = (
+    "ItemRegistry",
+    "item_models"
+)
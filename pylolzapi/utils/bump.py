@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+
+from typing import Callable, Iterable
+
+from pylolzapi.utils.exceptions import CircuitOpenError, LolzAPIError, ServerError
+
+# Подстроки ошибок market_bump (без учета регистра), которые значат, что интервал поднятия еще не прошел.
+COOLDOWN_ERRORS = ("можно поднимать", "сможете поднять", "не чаще", "раз в", "подождите", "через",
+                   "too often", "once every", "you can bump")
+
+
+class Cooldown:
+    def __init__(self, initial: float = 12 * 3600, tolerance: float = 300):
+        """
+        Оценка интервала между поднятиями, уточняется бинарным поиском по ответам API:
+        поднятие через elapsed секунд удалось - интервал не больше elapsed, отказ - больше.
+        :param initial: Начальная оценка, секунды
+        :param tolerance: Точность, после которой оценка считается найденной
+        """
+        self.initial = initial
+        self.tolerance = tolerance
+        self.low = 0.0
+        self.high: float | None = None
+
+    @property
+    def learned(self) -> bool:
+        return self.high is not None and self.high - self.low <= self.tolerance
+
+    def next_try(self) -> float:
+        """Через сколько секунд после прошлого поднятия пробовать следующее."""
+        if self.high is None:
+            return max(self.initial, self.low * 2)
+        if self.learned:
+            return self.high
+
+        return (self.low + self.high) / 2
+
+    def success(self, elapsed: float):
+        self.high = elapsed if self.high is None else min(self.high, elapsed)
+        self.low = min(self.low, self.high)
+
+    def failure(self, elapsed: float):
+        self.low = max(self.low, elapsed)
+        if self.high is not None and self.high <= self.low:
+            # Интервал вырос (или был неверно измерен) - ищем заново сверху.
+            self.high = None
+
+
+class BumpResult:
+    __slots__ = ("item_id", "ok", "error", "next_at")
+
+    def __init__(self, item_id: int, ok: bool, error: str | None, next_at: float | None):
+        """
+        :param next_at: Unix время следующей попытки, None - аккаунт убран из расписания
+        """
+        self.item_id = item_id
+        self.ok = ok
+        self.error = error
+        self.next_at = next_at
+
+    def __repr__(self):
+        return f"BumpResult(item_id={self.item_id!r}, ok={self.ok!r}, next_at={self.next_at!r})"
+
+
+class BumpScheduler:
+    def __init__(self, api, cooldown: float = 12 * 3600, tolerance: float = 300, retry_delay: float = 60,
+                 min_retry: float = 60, max_failures: int = 5, cooldown_errors: tuple[str, ...] = COOLDOWN_ERRORS):
+        """
+        Поднимает аккаунты ровно тогда, когда им можно подниматься. Время следующего поднятия каждого
+        аккаунта лежит в куче, интервал поднятия изучается по ответам API отдельно для каждой группы.
+        :param api: LZTApi
+        :param cooldown: Начальная оценка интервала между поднятиями одного аккаунта, секунды
+        :param tolerance: Точность изучения интервала, секунды
+        :param retry_delay: Через сколько повторить после сетевой ошибки или ошибки API, не связанной с интервалом
+        :param min_retry: Не пробовать повторно раньше, чем через столько секунд после отказа
+        :param max_failures: После стольких ошибок API подряд, не связанных с интервалом (аккаунт продан, удален,
+        нет прав), аккаунт убирается из расписания
+        :param cooldown_errors: Подстроки ошибок (без учета регистра), по которым отказ считается отказом по
+        интервалу. Только такие отказы уточняют оценку интервала группы
+        """
+        self.api = api
+        self.tolerance = tolerance
+        self.initial = cooldown
+        self.retry_delay = retry_delay
+        self.min_retry = min_retry
+        self.max_failures = max_failures
+        self.cooldown_errors = tuple(error.lower() for error in cooldown_errors)
+        self.cooldowns: dict[str, Cooldown] = {}
+
+        self._heap: list[tuple[float, int, int]] = []
+        self._items: dict[int, dict] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def __len__(self):
+        return len(self._items)
+
+    def _cooldown(self, group: str) -> Cooldown:
+        cooldown = self.cooldowns.get(group)
+        if cooldown is None:
+            cooldown = self.cooldowns[group] = Cooldown(self.initial, self.tolerance)
+
+        return cooldown
+
+    def _schedule(self, item_id: int, at: float):
+        entry = self._items.get(item_id)
+        if entry is None:
+            return
+        entry["next_at"] = at
+        entry["seq"] = seq = next(self._seq)
+        heapq.heappush(self._heap, (at, seq, item_id))
+
+    def add(self, item_id: int, last_bump: float = None, group: str = "default"):
+        """
+        :param item_id: ID аккаунта
+        :param last_bump: Unix время прошлого поднятия, если известно (иначе попытка сразу)
+        :param group: Группа с общим интервалом поднятия, например категория
+        """
+        with self._lock:
+            self._items[item_id] = {"last": last_bump, "group": group, "failures": 0}
+            at = last_bump + self._cooldown(group).next_try() if last_bump is not None else time.time()
+            self._schedule(item_id, at)
+
+    def extend(self, item_ids: Iterable[int], group: str = "default"):
+        for item_id in item_ids:
+            self.add(item_id, group=group)
+
+    def remove(self, item_id: int):
+        """Убирает аккаунт, его запись в куче пропускается при извлечении."""
+        with self._lock:
+            self._items.pop(item_id, None)
+
+    def next_at(self) -> float | None:
+        """Unix время ближайшего поднятия."""
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_stale(self):
+        while self._heap:
+            at, seq, item_id = self._heap[0]
+            entry = self._items.get(item_id)
+            if entry is not None and entry["seq"] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def _pop_due(self, now: float) -> int | None:
+        with self._lock:
+            while True:
+                self._drop_stale()
+                if not self._heap or self._heap[0][0] > now:
+                    return None
+
+                item_id = heapq.heappop(self._heap)[2]
+                entry = self._items[item_id]
+                if entry["last"] is None:
+                    return item_id
+
+                # Пока аккаунт ждал, отказ у другого аккаунта группы мог увеличить оценку интервала.
+                at = entry["last"] + self._cooldown(entry["group"]).next_try()
+                if at <= now:
+                    return item_id
+                self._schedule(item_id, at)
+
+    def _bump(self, item_id: int) -> BumpResult | None:
+        entry = self._items.get(item_id)
+        if entry is None:
+            return None
+        cooldown = self._cooldown(entry["group"])
+        try:
+            self.api.market_bump(item_id)
+        except CircuitOpenError:
+            # Аккаунт уже снят с кучи: без новой записи он больше не поднимется.
+            with self._lock:
+                self._schedule(item_id, time.time() + self.retry_delay)
+            raise
+        except LolzAPIError as e:
+            if isinstance(e, ServerError) or not self._is_cooldown(e):
+                return self._failed(item_id, entry, e)
+
+            now = time.time()
+            with self._lock:
+                entry["failures"] = 0
+                if entry["last"] is not None:
+                    elapsed = now - entry["last"]
+                    cooldown.failure(elapsed)
+                    at = max(entry["last"] + cooldown.next_try(), now + self.min_retry)
+                else:
+                    at = now + max(self.min_retry, cooldown.next_try() / 2)
+                self._schedule(item_id, at)
+            return BumpResult(item_id, False, str(e), at)
+        except Exception as e:
+            with self._lock:
+                at = time.time() + self.retry_delay
+                self._schedule(item_id, at)
+            return BumpResult(item_id, False, str(e), at)
+
+        now = time.time()
+        with self._lock:
+            entry["failures"] = 0
+            if entry["last"] is not None:
+                cooldown.success(now - entry["last"])
+            entry["last"] = now
+            at = now + cooldown.next_try()
+            self._schedule(item_id, at)
+        return BumpResult(item_id, True, None, at)
+
+    def _is_cooldown(self, error: LolzAPIError) -> bool:
+        message = str(error).lower()
+        return any(phrase in message for phrase in self.cooldown_errors)
+
+    def _failed(self, item_id: int, entry: dict, error: LolzAPIError) -> BumpResult:
+        """Ошибка API, не связанная с интервалом: повтор через retry_delay без изменения оценки интервала."""
+        with self._lock:
+            entry["failures"] += 1
+            if not isinstance(error, ServerError) and entry["failures"] >= self.max_failures:
+                self._items.pop(item_id, None)
+                return BumpResult(item_id, False, str(error), None)
+
+            at = time.time() + self.retry_delay
+            self._schedule(item_id, at)
+        return BumpResult(item_id, False, str(error), at)
+
+    def run_pending(self, limit: int = None) -> list[BumpResult]:
+        """
+        Поднимает все аккаунты, время которых пришло.
+        :param limit: Максимум поднятий за вызов
+        """
+        results = []
+        now = time.time()
+        while limit is None or len(results) < limit:
+            item_id = self._pop_due(now)
+            if item_id is None:
+                break
+            result = self._bump(item_id)
+            if result is not None:
+                results.append(result)
+
+        return results
+
+    def run(self, callback: Callable[[BumpResult], None] = None, idle: float = 60):
+        """
+        Поднимает аккаунты до stop(), между поднятиями спит до ближайшего.
+        :param callback: callback(result) после каждой попытки
+        :param idle: Максимальный сон, если аккаунтов нет (их можно добавлять из других потоков)
+        """
+        self._stopped.clear()
+        while not self._stopped.is_set():
+            for result in self.run_pending():
+                if callback is not None:
+                    callback(result)
+
+            at = self.next_at()
+            delay = idle if at is None else min(idle, at - time.time())
+            if delay > 0:
+                self._stopped.wait(delay)
+
+    def stop(self):
+        self._stopped.set()
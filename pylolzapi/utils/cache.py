@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+
+from collections import OrderedDict
+
+# Время жизни (секунды) ответов медленно меняющихся эндпоинтов. Остальное не кэшируется.
+DEFAULT_TTL = {
+    "me": 60,
+    "item": 30,
+    "params": 600,
+    "games": 600,
+}
+
+_ENDPOINTS = (
+    ("me", re.compile(r"^users/me/?$")),
+    ("item", re.compile(r"^market/\d+/?$")),
+    ("params", re.compile(r"^market/[\w-]+/params/?$")),
+    ("games", re.compile(r"^market/[\w-]+/games/?$")),
+)
+_ITEM_RE = re.compile(r"^market/(\d+)")
+
+
+def cache_endpoint(url: str) -> str | None:
+    """
+    Имя кэшируемого эндпоинта или None.
+    :param url: Путь запроса без базового адреса
+    """
+    for name, pattern in _ENDPOINTS:
+        if pattern.match(url):
+            return name
+
+    return None
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = 1024, ttl: dict = None):
+        """
+        LRU кэш GET ответов с временем жизни на каждый эндпоинт. Потокобезопасен.
+        :param maxsize: Максимум записей, самые давно использованные вытесняются
+        :param ttl: {эндпоинт: секунды}, дополняет DEFAULT_TTL. 0 отключает кэш эндпоинта
+        """
+        self.maxsize = maxsize
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self.hits = 0
+        self.misses = 0
+
+        self._data: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(method: str, url: str, params: dict = None) -> tuple:
+        return method, url, json.dumps(params or {}, sort_keys=True, default=str)
+
+    def _ttl(self, url: str) -> float:
+        endpoint = cache_endpoint(url)
+        return self.ttl.get(endpoint, 0) if endpoint is not None else 0
+
+    def get(self, method: str, url: str, params: dict = None) -> dict | None:
+        """
+        Ответ из кэша или None. Записи, кроме GET, никогда не кэшируются.
+        """
+        if method != "GET" or not self._ttl(url):
+            return None
+
+        key = self.key(method, url, params)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, method: str, url: str, params: dict, value: dict):
+        ttl = self._ttl(url)
+        if method != "GET" or not ttl:
+            return
+
+        key = self.key(method, url, params)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, url: str = None):
+        """
+        Удаляет записи эндпоинта (со всеми параметрами) или весь кэш.
+        :param url: Путь запроса без базового адреса, None - очистить все
+        """
+        with self._lock:
+            if url is None:
+                self._data.clear()
+                return
+
+            for key in [key for key in self._data if key[1] == url]:
+                del self._data[key]
+
+    def invalidate_item(self, item: int):
+        """
+        Удаляет закэшированный market_item аккаунта.
+        :param item: ID аккаунта
+        """
+        self.invalidate(f"market/{item}")
+
+    def on_write(self, url: str):
+        """
+        Сбрасывает записи, которые могли устареть после изменяющего запроса:
+        аккаунт, с которым работали, и профиль (баланс).
+        :param url: Путь изменяющего запроса
+        """
+        match = _ITEM_RE.match(url)
+        if match:
+            self.invalidate_item(int(match.group(1)))
+
+        self.invalidate("users/me")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+    def __len__(self):
+        return len(self._data)
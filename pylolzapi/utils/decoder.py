@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import codecs
+import json
+import re
+
+from typing import Any, Callable, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_WS = re.compile(r"[ \t\n\r]*")
+_INCOMPLETE = object()
+_NUMBER_TAIL = frozenset(".eE+-0123456789")
+
+
+def get_loads(backend: str | Callable[[bytes], Any] = "auto") -> Callable[[bytes], Any]:
+    """
+    Функция декодирования JSON. Ошибки разбора у всех бэкендов - подклассы ValueError.
+    :param backend: auto - orjson, если установлен, иначе json; orjson; json; или своя функция loads(bytes)
+    """
+    if callable(backend):
+        return backend
+    if backend == "auto":
+        backend = "orjson" if orjson is not None else "json"
+    if backend == "orjson":
+        if orjson is None:
+            raise ImportError("Бэкенд orjson не установлен: pip install pylolzapi[fast]")
+        return orjson.loads
+    if backend == "json":
+        return json.loads
+
+    raise ValueError(f"Неизвестный JSON бэкенд: {backend!r}")
+
+
+class ItemsStream:
+    def __init__(self, key: str = "items"):
+        """
+        Инкрементальный разбор ответа вида {"items": [...], ...} по мере загрузки тела.
+        Записи массива (или значения объекта, как в payments) отдаются сразу после того, как пришли целиком,
+        остальные ключи ответа собираются в meta.
+        :param key: Ключ списка записей
+        """
+        self.key = key
+        self.meta: dict = {}
+        self.count = 0
+
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+        self._member = None
+        self._text = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._decoder = json.JSONDecoder()
+
+    @property
+    def text(self) -> str:
+        """Тело ответа, если оно оказалось не JSON объектом."""
+        return self._buf
+
+    def feed(self, chunk: bytes) -> list:
+        """
+        Добавляет кусок тела ответа и возвращает записи, которые пришли целиком.
+        :param chunk: Очередной кусок тела
+        """
+        return self._feed(chunk, False)
+
+    def close(self) -> list:
+        """Завершает разбор. ValueError, если тело не JSON объект или оборвано."""
+        records = self._feed(b"", True)
+        if self._state == "raw":
+            raise ValueError("Ответ не является JSON объектом")
+        if self._state != "done":
+            raise ValueError("Ответ оборван")
+
+        return records
+
+    def _feed(self, chunk: bytes, final: bool) -> list:
+        self._buf += self._text.decode(chunk, final)
+        records = []
+
+        while self._step(records, final):
+            pass
+
+        if self._pos and self._state != "raw":
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+
+        self.count += len(records)
+        return records
+
+    def _value(self, final: bool):
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return _INCOMPLETE
+
+        # Число может продолжиться в следующем куске: "1" -> "15", а после "1." или "1e" raw_decode отдает 1.
+        if not final and isinstance(value, (int, float)) and not isinstance(value, bool) \
+                and (end == len(self._buf) or self._buf[end] in _NUMBER_TAIL):
+            return _INCOMPLETE
+
+        self._pos = end
+        return value
+
+    def _expect(self, char: str, state: str) -> bool:
+        if self._buf[self._pos] != char:
+            raise ValueError(f"Ожидался {char!r} на позиции {self._pos}")
+
+        self._pos += 1
+        self._state = state
+        return True
+
+    def _step(self, records: list, final: bool) -> bool:
+        state = self._state
+        if state in ("raw", "done"):
+            return False
+
+        self._pos = _WS.match(self._buf, self._pos).end()
+        if self._pos >= len(self._buf):
+            return False
+        char = self._buf[self._pos]
+
+        if state == "start":
+            if char != "{":
+                self._state = "raw"
+                return False
+            return self._expect("{", "key")
+
+        if state in ("key", "records_key"):
+            if char == "}":
+                return self._expect("}", "done" if state == "key" else "next")
+            key = self._value(final)
+            if key is _INCOMPLETE:
+                return False
+            if state == "key":
+                self._member = key
+            self._state = "colon" if state == "key" else "records_colon"
+            return True
+
+        if state in ("colon", "records_colon"):
+            return self._expect(":", "value" if state == "colon" else "records")
+
+        if state == "value":
+            if self._member == self.key and char in "[{":
+                self.meta[self.key] = [] if char == "[" else {}
+                return self._expect(char, "records" if char == "[" else "records_key")
+            value = self._value(final)
+            if value is _INCOMPLETE:
+                return False
+            self.meta[self._member] = value
+            self._state = "next"
+            return True
+
+        if state == "next":
+            if char == "}":
+                return self._expect("}", "done")
+            return self._expect(",", "key")
+
+        if state == "records":
+            if char == "]" and isinstance(self.meta[self.key], list):
+                return self._expect("]", "next")
+            record = self._value(final)
+            if record is _INCOMPLETE:
+                return False
+            records.append(record)
+            self._state = "records_next"
+            return True
+
+        if state == "records_next":
+            closing = "]" if isinstance(self.meta[self.key], list) else "}"
+            if char == closing:
+                return self._expect(closing, "next")
+            return self._expect(",", "records" if closing == "]" else "records_key")
+
+        return False
+
+
+def iter_records(chunks: Iterator[bytes], stream: ItemsStream) -> Iterator[dict]:
+    """
+    Отдает записи из кусков тела ответа по мере их поступления.
+    :param chunks: Куски тела ответа
+    :param stream: Парсер, после исчерпания в stream.meta остальные ключи ответа
+    """
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+
+    yield from stream.close()
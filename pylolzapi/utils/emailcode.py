@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import time
+
+from typing import Any, Callable
+
+from pylolzapi.utils.exceptions import EmailCodeTimeout, LolzAPIError
+
+# Ошибки market_get_email, которые означают, что письмо еще не пришло.
+PENDING_ERRORS = ("не найден", "не пришл", "нет писем", "not found", "no email", "not received", "not yet")
+
+
+class EmailCode:
+    __slots__ = ("item", "email", "code", "data", "attempts", "elapsed")
+
+    def __init__(self, item: int, email: str, code: str, data: dict, attempts: int, elapsed: float):
+        """
+        :param item: ID аккаунта
+        :param email: Почта
+        :param code: Код подтверждения
+        :param data: Ответ market_get_email
+        :param attempts: Сколько запросов понадобилось
+        :param elapsed: Секунд от начала ожидания
+        """
+        self.item = item
+        self.email = email
+        self.code = code
+        self.data = data
+        self.attempts = attempts
+        self.elapsed = elapsed
+
+    def __str__(self):
+        return self.code
+
+    def __repr__(self):
+        return f"EmailCode(item={self.item!r}, code={self.code!r}, attempts={self.attempts!r})"
+
+
+def extract_code(resp: dict, since: int = None) -> str | None:
+    """
+    Код из ответа market_get_email или None, если письма еще нет.
+    :param since: Не принимать коды из писем, пришедших раньше этого unix времени
+    """
+    data = resp.get("codeData") if isinstance(resp.get("codeData"), dict) else resp
+    code = data.get("code")
+    if not code:
+        return None
+    if since is not None and (data.get("date") or 0) < since:
+        return None
+
+    return str(code)
+
+
+class _Wait:
+    __slots__ = ("item", "email", "since", "started", "deadline", "interval", "attempts", "seq")
+
+    def __init__(self, item: int, email: str, since: int | None, timeout: float, interval: float):
+        self.item = item
+        self.email = email
+        self.since = since
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout
+        self.interval = interval
+        self.attempts = 0
+        self.seq = 0
+
+
+class EmailCodePoller:
+    def __init__(self, api, max_rate: float = 1.0, initial: float = 1.0, backoff: float = 1.5,
+                 max_interval: float = 15, pending_errors: tuple[str, ...] = PENDING_ERRORS):
+        """
+        Ожидание кодов с почты маркета для нескольких аккаунтов сразу: каждый аккаунт опрашивается
+        сначала часто, затем все реже, а все опросы вместе не чаще max_rate в секунду.
+        :param api: LZTApi или AsyncLZTApi
+        :param max_rate: Максимум запросов в секунду на все ожидания, чтобы оставить лимит другим запросам
+        :param initial: Первый интервал опроса аккаунта, секунды
+        :param backoff: Во сколько раз интервал растет после каждого пустого ответа
+        :param max_interval: Максимальный интервал опроса аккаунта
+        :param pending_errors: Подстроки ошибок API (без учета регистра), которые значат, что письма еще нет.
+        Остальные ошибки API завершают ожидание этого аккаунта
+        """
+        self.api = api
+        self.min_gap = 1 / max_rate
+        self.initial = initial
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.pending_errors = tuple(error.lower() for error in pending_errors)
+        self.results: dict[tuple[int, str], EmailCode | Exception] = {}
+
+        self._heap: list[tuple[float, int, _Wait]] = []
+        self._seq = itertools.count()
+        self._last_poll = 0.0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add(self, item: int, email: str, timeout: float = 120, since: int = None):
+        """
+        :param item: ID аккаунта
+        :param email: Почта аккаунта
+        :param timeout: Сколько секунд ждать код
+        :param since: Не принимать коды из писем раньше этого unix времени (например, времени покупки)
+        """
+        wait = _Wait(item, email, since, timeout, self.initial)
+        # Первый запрос сразу: код мог прийти, пока шла покупка.
+        self._push(wait, wait.started)
+
+    def _push(self, wait: _Wait, at: float):
+        wait.seq = next(self._seq)
+        heapq.heappush(self._heap, (at, wait.seq, wait))
+
+    def _next_delay(self) -> float:
+        if not self._heap:
+            return 0.0
+        at = max(self._heap[0][0], self._last_poll + self.min_gap)
+        return max(0.0, at - time.monotonic())
+
+    def _pending(self, error: LolzAPIError) -> bool:
+        message = str(error).lower()
+        return any(pending in message for pending in self.pending_errors)
+
+    def _handle(self, wait: _Wait, resp: dict | None, error: Exception | None) -> EmailCode | Exception | None:
+        """Результат ожидания, если оно закончилось, иначе None и следующий опрос в очереди."""
+        now = time.monotonic()
+        key = (wait.item, wait.email)
+
+        if error is not None:
+            if isinstance(error, LolzAPIError) and not self._pending(error):
+                self.results[key] = error
+                return error
+        else:
+            code = extract_code(resp, wait.since)
+            if code is not None:
+                self.results[key] = result = EmailCode(wait.item, wait.email, code, resp, wait.attempts,
+                                                       now - wait.started)
+                return result
+
+        if now >= wait.deadline:
+            self.results[key] = error = EmailCodeTimeout(
+                f"Код для аккаунта {wait.item} не пришел за {now - wait.started:.0f} с ({wait.attempts} запросов)")
+            return error
+
+        self._push(wait, min(now + wait.interval, wait.deadline))
+        wait.interval = min(wait.interval * self.backoff, self.max_interval)
+        return None
+
+    def _pop(self) -> _Wait:
+        self._last_poll = time.monotonic()
+        wait = heapq.heappop(self._heap)[2]
+        wait.attempts += 1
+        return wait
+
+    def run(self, callback: Callable[[EmailCode | Exception], Any] = None
+            ) -> dict[tuple[int, str], EmailCode | Exception]:
+        """
+        Опрашивает почту, пока все ожидания не закончатся.
+        :param callback: callback(результат) сразу после каждого кода или ошибки
+        :return: {(item, email): EmailCode или исключение (EmailCodeTimeout, LolzAPIError)}
+        """
+        while self._heap:
+            time.sleep(self._next_delay())
+            wait = self._pop()
+            resp = error = None
+            try:
+                resp = self.api.market_get_email(wait.item, wait.email)
+            except Exception as e:
+                error = e
+
+            result = self._handle(wait, resp, error)
+            if result is not None and callback is not None:
+                callback(result)
+
+        return self.results
+
+    async def run_async(self, callback: Callable[[EmailCode | Exception], Any] = None
+                        ) -> dict[tuple[int, str], EmailCode | Exception]:
+        """То же, что run, для AsyncLZTApi. callback может быть корутиной."""
+        import asyncio
+        import inspect
+
+        while self._heap:
+            await asyncio.sleep(self._next_delay())
+            wait = self._pop()
+            resp = error = None
+            try:
+                resp = await self.api.market_get_email(wait.item, wait.email)
+            except Exception as e:
+                error = e
+
+            result = self._handle(wait, resp, error)
+            if result is not None and callback is not None:
+                returned = callback(result)
+                if inspect.isawaitable(returned):
+                    await returned
+
+        return self.results
@@ -1,2 +1,20 @@
 class LolzAPIError(Exception):
     pass
+
+
+class ServerError(LolzAPIError):
+    """Ответ 5xx или HTML страница вместо JSON: неизвестно, выполнило ли API запрос."""
+
+    def __init__(self, message: str, status: int = None):
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpenError(LolzAPIError):
+    """API недоступно: CircuitBreaker не пропускает запросы до окончания recovery_timeout."""
+    pass
+
+
+class EmailCodeTimeout(LolzAPIError):
+    """Код подтверждения не пришел на почту за отведенное время."""
+    pass
@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import time
+
+from datetime import datetime
+from typing import Any, Callable, Iterable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from pylolzapi.types.lazy import LazyView
+from pylolzapi.utils.paginate import timestamp
+
+# Числовые колонки и их dtype. Отсутствующее значение (None) хранится как -1.
+NUMERIC_COLUMNS = {
+    "item_id": "int64",
+    "price": "int64",
+    "rub_price": "int64",
+    "category_id": "int16",
+    "published_date": "int64",
+    "refreshed_date": "int64",
+    "view_count": "int32",
+    "is_sticky": "int8",
+    "extended_guarantee": "int8",
+}
+# Строковые колонки хранятся кодами из словаря значений.
+CATEGORICAL_COLUMNS = ("item_origin", "email_type", "item_state")
+
+OPERATION_COLUMNS = {
+    "operation_id": "int64",
+    "operation_date": "int64",
+    "incoming_sum": "int64",
+    "outgoing_sum": "int64",
+    "item_id": "int64",
+    "is_hold": "int8",
+    "hold_end_date": "int64",
+}
+
+MISSING = -1
+
+
+def _raw(item) -> dict:
+    if isinstance(item, dict):
+        return item
+    if isinstance(item, LazyView):
+        return item.raw
+
+    return item.__dict__
+
+
+class _ColumnIndex:
+    """Колонки NumPy с одной строкой на ключ записи. Наследники задают ключ и колонки."""
+    key: str = None
+    numeric: dict[str, str] = {}
+    categorical: tuple[str, ...] = ()
+    # Значения вместо None для колонок, где -1 не подходит (например, суммы).
+    defaults: dict[str, int] = {}
+
+    def __init__(self, capacity: int = 1024):
+        """
+        :param capacity: Начальный размер массивов, дальше растут вдвое
+        """
+        if np is None:
+            raise ImportError(f"{type(self).__name__} требует numpy: pip install pylolzapi[analytics]")
+
+        self._size = 0
+        self._rows: dict[int, int] = {}
+        self._columns = {name: np.full(capacity, MISSING, dtype) for name, dtype in self.numeric.items()}
+        self._columns.update({name: np.full(capacity, MISSING, "int16") for name in self.categorical})
+        self._codes: dict[str, dict[str, int]] = {name: {} for name in self.categorical}
+        self._values: dict[str, list[str]] = {name: [] for name in self.categorical}
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return tuple(self._columns)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Колонка длиной len(index), без копирования. Категориальные - коды, см. labels()."""
+        return self._columns[name][:self._size]
+
+    def labels(self, name: str, mask: np.ndarray = None) -> list[str | None]:
+        """Значения категориальной колонки строками."""
+        values = self._values[name]
+        codes = self[name] if mask is None else self[name][mask]
+        return [values[code] if code != MISSING else None for code in codes.tolist()]
+
+    def _grow(self, needed: int):
+        capacity = len(self._columns[self.key])
+        if needed <= capacity:
+            return
+
+        while capacity < needed:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.full(capacity, MISSING, column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def _code(self, name: str, value: str | None) -> int:
+        if value is None:
+            return MISSING
+
+        codes = self._codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self._values[name])
+            self._values[name].append(value)
+
+        return code
+
+    def extend(self, records: Iterable) -> int:
+        """
+        Добавляет страницу записей: модели, представления или словари ответа API.
+        Повторно добавленный ключ обновляет свою строку.
+        :return: Сколько записей добавлено впервые
+        """
+        raws = [_raw(record) for record in records]
+        rows = np.empty(len(raws), "int64")
+        added = 0
+        for i, raw in enumerate(raws):
+            key = raw.get(self.key)
+            row = self._rows.get(key)
+            if row is None:
+                row = self._rows[key] = self._size + added
+                added += 1
+            rows[i] = row
+
+        self._grow(self._size + added)
+        for name in self.numeric:
+            missing = self.defaults.get(name, MISSING)
+            values = [raw.get(name) for raw in raws]
+            self._columns[name][rows] = [missing if value is None else value for value in values]
+        for name in self.categorical:
+            self._columns[name][rows] = [self._code(name, raw.get(name)) for raw in raws]
+
+        self._size += added
+        return added
+
+    def append(self, record) -> int:
+        return self.extend((record,))
+
+    def mask(self, **predicates: Any) -> np.ndarray:
+        """
+        Булева маска строк, подходящих под все условия:
+        значение - равенство, (min, max) - диапазон включительно (None - без границы),
+        list/set - одно из значений, функция - fn(колонка) -> маска.
+        Пример: items.mask(price=(None, 500), category_id=1, item_origin=["brute", "stealer"])
+        """
+        result = np.ones(self._size, bool)
+        for name, predicate in predicates.items():
+            column = self[name]
+            if callable(predicate):
+                result &= predicate(column)
+            elif isinstance(predicate, tuple):
+                low, high = predicate
+                if low is not None:
+                    result &= column >= self._encode(name, low)
+                if high is not None:
+                    result &= column <= self._encode(name, high)
+            elif isinstance(predicate, (list, set, frozenset)):
+                result &= np.isin(column, [self._encode(name, value) for value in predicate])
+            else:
+                result &= column == self._encode(name, predicate)
+
+        return result
+
+    def _encode(self, name: str, value):
+        if name in self._codes:
+            return self._codes[name].get(value, -2) if value is not None else MISSING
+        return value
+
+    def percentiles(self, column: str = "price", q: Iterable[float] = (5, 25, 50, 75, 95),
+                    mask: np.ndarray = None) -> dict[float, float]:
+        """
+        Перцентили колонки, пропуски не учитываются.
+        :param q: Перцентили от 0 до 100
+        :param mask: Только строки маски
+        """
+        values = self[column] if mask is None else self[column][mask]
+        values = values[values != MISSING]
+        q = list(q)
+        if not len(values):
+            return dict.fromkeys(q)
+
+        return dict(zip(q, np.percentile(values, q).tolist()))
+
+    def group_stats(self, by: str = "category_id", column: str = "price",
+                    mask: np.ndarray = None) -> dict[Any, dict[str, float]]:
+        """
+        Статистика колонки по группам: {группа: {count, min, max, mean, median}}.
+        :param by: Колонка группировки (для категориальных ключи - строки)
+        :param column: Колонка значений
+        :param mask: Только строки маски
+        """
+        keys, values = self[by], self[column]
+        selected = values != MISSING
+        if mask is not None:
+            selected &= mask
+        keys, values = keys[selected], values[selected]
+        if not len(values):
+            return {}
+
+        order = np.lexsort((values, keys))
+        keys, values = keys[order], values[order]
+        groups, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+        sums = np.add.reduceat(values.astype("float64"), starts)
+        ends = starts + counts - 1
+        medians = (values[starts + (counts - 1) // 2] + values[starts + counts // 2]) / 2
+
+        names: Callable = (lambda code: self._values[by][code] if code != MISSING else None) \
+            if by in self._values else (lambda key: key)
+        return {
+            names(group): {
+                "count": int(count),
+                "min": float(values[start]),
+                "max": float(values[end]),
+                "mean": float(total / count),
+                "median": float(median),
+            }
+            for group, start, end, count, total, median
+            in zip(groups.tolist(), starts, ends, counts, sums, medians)
+        }
+
+
+class ItemIndex(_ColumnIndex):
+    """
+    Колоночное хранилище аккаунтов в массивах NumPy для фильтрации и статистики по большим выдачам.
+    Повторно добавленный item_id обновляет свою строку. Требует numpy: pip install pylolzapi[analytics]
+    """
+    key = "item_id"
+    numeric = NUMERIC_COLUMNS
+    categorical = CATEGORICAL_COLUMNS
+
+    def ids(self, mask: np.ndarray = None) -> np.ndarray:
+        """item_id строк маски."""
+        return self["item_id"] if mask is None else self["item_id"][mask]
+
+
+class OperationIndex(_ColumnIndex):
+    """
+    История платежей в колонках NumPy: сводки по дням и типам, холды и прибыль по аккаунтам
+    без цикла по операциям. Повторно добавленный operation_id обновляет свою строку.
+    Заполняется из market_payments, iter_market_payments или PaymentLedger.operations().
+    Требует numpy: pip install pylolzapi[analytics]
+    """
+    key = "operation_id"
+    numeric = OPERATION_COLUMNS
+    categorical = ("operation_type",)
+    defaults = {"incoming_sum": 0, "outgoing_sum": 0, "item_id": 0, "is_hold": 0, "hold_end_date": 0}
+
+    def between(self, since: datetime | int = None, until: datetime | int = None) -> np.ndarray:
+        """Маска операций с since включительно до until."""
+        return self.mask(operation_date=(timestamp(since) if since is not None else None,
+                                         timestamp(until) - 1 if until is not None else None))
+
+    def _masked(self, mask: np.ndarray = None) -> tuple[np.ndarray, ...]:
+        columns = (self["operation_date"], self["incoming_sum"], self["outgoing_sum"], self["operation_type"])
+        return columns if mask is None else tuple(column[mask] for column in columns)
+
+    def rollup(self, period: str = "day", utc_offset: int = 0,
+               mask: np.ndarray = None) -> list[tuple[str, int, int]]:
+        """
+        Приход и расход по дням или неделям: [(YYYY-MM-DD, incoming, outgoing), ...], как PaymentLedger.sum_by_day.
+        :param period: day или week (неделя с понедельника, дата - ее понедельник)
+        :param utc_offset: Смещение часового пояса в секундах (10800 для МСК)
+        :param mask: Только операции маски, например index.mask(operation_type="sold_item")
+        """
+        if period not in ("day", "week"):
+            raise ValueError(f"period должен быть day или week, а не {period!r}")
+
+        dates, incoming, outgoing, _ = self._masked(mask)
+        days = (dates + utc_offset) // 86400
+        if period == "week":
+            # 1 января 1970 - четверг.
+            days -= (days + 3) % 7
+
+        periods, inverse = np.unique(days, return_inverse=True)
+        incoming = np.bincount(inverse, incoming, len(periods)).astype("int64")
+        outgoing = np.bincount(inverse, outgoing, len(periods)).astype("int64")
+        labels = periods.astype("datetime64[D]").astype(str)
+        return list(zip(labels.tolist(), incoming.tolist(), outgoing.tolist()))
+
+    def sum_by_type(self, mask: np.ndarray = None) -> dict[str, tuple[int, int]]:
+        """{operation_type: (incoming, outgoing)}, как PaymentLedger.sum_by_type."""
+        _, incoming, outgoing, types = self._masked(mask)
+        known = types != MISSING
+        size = len(self._values["operation_type"])
+        incoming = np.bincount(types[known], incoming[known], size).astype("int64")
+        outgoing = np.bincount(types[known], outgoing[known], size).astype("int64")
+        present = np.bincount(types[known], minlength=size) > 0
+
+        return {self._values["operation_type"][code]: (int(incoming[code]), int(outgoing[code]))
+                for code in np.flatnonzero(present).tolist()}
+
+    def hold_exposure(self, times: Iterable[datetime | int] = None, step: int = 86400,
+                      mask: np.ndarray = None) -> list[tuple[int, int]]:
+        """
+        Сумма в холде на моменты времени: операция держит incoming_sum с operation_date до hold_end_date.
+        Учитываются операции с hold_end_date, в том числе уже завершенные холды.
+        :param times: Моменты времени, по умолчанию от первой операции с холдом до последнего окончания с шагом step
+        :param step: Шаг моментов по умолчанию, секунды
+        :param mask: Только операции маски
+        :return: [(unix время, сумма в холде), ...]
+        """
+        held = self["hold_end_date"] > 0
+        if mask is not None:
+            held &= mask
+        starts, ends = self["operation_date"][held], self["hold_end_date"][held]
+        amounts = self["incoming_sum"][held]
+
+        if times is None:
+            if not len(starts):
+                return []
+            times = np.arange(starts.min(), ends.max() + step, step)
+        else:
+            times = np.array([timestamp(moment) for moment in times], "int64")
+
+        # В холде на момент t: начались не позже t минус закончились не позже t.
+        order = np.argsort(starts)
+        started = np.concatenate(([0], np.cumsum(amounts[order])))[np.searchsorted(starts[order], times, "right")]
+        order = np.argsort(ends)
+        ended = np.concatenate(([0], np.cumsum(amounts[order])))[np.searchsorted(ends[order], times, "right")]
+
+        return list(zip(times.tolist(), (started - ended).tolist()))
+
+    def pending_hold(self, at: datetime | int = None) -> int:
+        """Сумма в холде на момент at, по умолчанию сейчас."""
+        at = timestamp(at) if at is not None else int(time.time())
+        return self.hold_exposure([at])[0][1]
+
+    def item_profit(self, sold: str = "sold_item", paid: str = "paid_item", complete: bool = True,
+                    mask: np.ndarray = None) -> dict[int, dict[str, int]]:
+        """
+        Прибыль по аккаунтам: сумма продаж (incoming_sum операций sold) минус сумма покупок
+        (outgoing_sum операций paid) с тем же item_id.
+        :param sold: Тип операции продажи
+        :param paid: Тип операции покупки
+        :param complete: Только аккаунты, у которых есть и покупка, и продажа
+        :param mask: Только операции маски
+        :return: {item_id: {"cost", "revenue", "profit"}}
+        """
+        types, item_ids = self["operation_type"], self["item_id"]
+        is_sold = types == self._encode("operation_type", sold)
+        is_paid = types == self._encode("operation_type", paid)
+        selected = (is_sold | is_paid) & (item_ids > 0)
+        if mask is not None:
+            selected &= mask
+
+        ids, inverse = np.unique(item_ids[selected], return_inverse=True)
+        is_sold, is_paid = is_sold[selected], is_paid[selected]
+        revenue = np.bincount(inverse, np.where(is_sold, self["incoming_sum"][selected], 0), len(ids)).astype("int64")
+        cost = np.bincount(inverse, np.where(is_paid, self["outgoing_sum"][selected], 0), len(ids)).astype("int64")
+        if complete:
+            both = (np.bincount(inverse, is_sold, len(ids)) > 0) & (np.bincount(inverse, is_paid, len(ids)) > 0)
+            ids, revenue, cost = ids[both], revenue[both], cost[both]
+
+        return {item_id: {"cost": c, "revenue": r, "profit": r - c}
+                for item_id, c, r in zip(ids.tolist(), cost.tolist(), revenue.tolist())}
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+
+from datetime import datetime
+
+from pylolzapi.types.lazy import LazyView
+from pylolzapi.utils.paginate import timestamp
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    operation_id INTEGER PRIMARY KEY,
+    operation_date INTEGER NOT NULL,
+    operation_type TEXT NOT NULL,
+    incoming_sum INTEGER NOT NULL,
+    outgoing_sum INTEGER NOT NULL,
+    item_id INTEGER,
+    is_hold INTEGER NOT NULL,
+    hold_end_date INTEGER,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS operations_date ON operations (operation_date);
+CREATE INDEX IF NOT EXISTS operations_type ON operations (operation_type, operation_date);
+CREATE INDEX IF NOT EXISTS operations_item ON operations (item_id);
+CREATE INDEX IF NOT EXISTS operations_hold ON operations (is_hold, hold_end_date);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+_UPSERT = """
+INSERT INTO operations (operation_id, operation_date, operation_type, incoming_sum, outgoing_sum,
+                        item_id, is_hold, hold_end_date, raw)
+VALUES (:operation_id, :operation_date, :operation_type, :incoming_sum, :outgoing_sum,
+        :item_id, :is_hold, :hold_end_date, :raw)
+ON CONFLICT (operation_id) DO UPDATE SET
+    operation_date = excluded.operation_date, operation_type = excluded.operation_type,
+    incoming_sum = excluded.incoming_sum, outgoing_sum = excluded.outgoing_sum, item_id = excluded.item_id,
+    is_hold = excluded.is_hold, hold_end_date = excluded.hold_end_date, raw = excluded.raw
+"""
+
+# Запас по краям окна при перепроверке холдов: API принимает даты без часового пояса.
+_HOLD_MARGIN = 86400
+
+
+def _row(operation) -> dict:
+    raw = operation.raw if isinstance(operation, LazyView) else operation.dict()
+    return {
+        "operation_id": raw["operation_id"],
+        "operation_date": raw.get("operation_date") or 0,
+        "operation_type": raw.get("operation_type") or "",
+        "incoming_sum": raw.get("incoming_sum") or 0,
+        "outgoing_sum": raw.get("outgoing_sum") or 0,
+        "item_id": raw.get("item_id"),
+        "is_hold": int(raw.get("is_hold") or 0),
+        "hold_end_date": raw.get("hold_end_date"),
+        "raw": json.dumps(raw, ensure_ascii=False, default=str),
+    }
+
+
+class PaymentLedger:
+    def __init__(self, path: str = "payments.sqlite3"):
+        """
+        Локальная копия истории market_payments одного аккаунта в SQLite.
+        sync() догружает только операции новее сохраненной отметки и один раз перепроверяет холды,
+        у которых с прошлой синхронизации прошел hold_end_date. Запросы к истории выполняются локально.
+        :param path: Файл базы, ":memory:" - в памяти
+        """
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _meta(self, key: str) -> str | None:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _set_meta(self, key: str, value):
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    @property
+    def high_water_mark(self) -> int | None:
+        """operation_date самой новой операции на момент последней завершенной синхронизации."""
+        value = self._meta("high_water_mark")
+        return int(value) if value is not None else None
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM operations").fetchone()[0]
+
+    def _store(self, operations) -> tuple[int, int]:
+        """Сохраняет операции, возвращает (новых, обновленных)."""
+        before = len(self)
+        rows = [_row(operation) for operation in operations]
+        self._db.executemany(_UPSERT, rows)
+        added = len(self) - before
+
+        return added, len(rows) - added
+
+    def sync(self, api, overlap: int = 0, recheck_holds: bool = True) -> dict:
+        """
+        Догружает новые операции. Запись идет одной транзакцией: прерванная синхронизация
+        не сдвигает отметку и повторится целиком.
+        :param api: LZTApi аккаунта, историю которого хранит база
+        :param overlap: На сколько секунд раньше отметки начинать, чтобы подхватить операции,
+        которые появились в выдаче с опозданием
+        :param recheck_holds: Перезагрузить холды, у которых с прошлой перепроверки прошел hold_end_date
+        :return: {"new": ..., "updated": ..., "holds_rechecked": ...}
+        """
+        user_id = self._meta("user_id")
+        if user_id is not None and int(user_id) != api.user_id:
+            raise ValueError(f"База {self.path} ведется для аккаунта {user_id}, а не {api.user_id}")
+
+        mark = self.high_water_mark
+        since = mark - overlap if mark is not None else None
+
+        with self._db:
+            now = int(time.time())
+            operations = list(api.iter_market_payments(since=since))
+            added, updated = self._store(operations)
+
+            rechecked = 0
+            if recheck_holds:
+                rechecked = self._recheck_holds(api, now)
+            # Первая синхронизация загружает холды свежими, перепроверять их нужно с этого момента.
+            if recheck_holds or self._meta("holds_checked_at") is None:
+                self._set_meta("holds_checked_at", now)
+
+            newest = max((row.operation_date for row in operations), default=None)
+            if newest is not None and (mark is None or newest > mark):
+                self._set_meta("high_water_mark", newest)
+            self._set_meta("user_id", api.user_id)
+            self._set_meta("synced_at", int(time.time()))
+
+        return {"new": added, "updated": updated, "holds_rechecked": rechecked}
+
+    def _recheck_holds(self, api, now: int) -> int:
+        # Только холды, которые были активны при прошлой перепроверке и закончились с тех пор:
+        # закончившиеся раньше уже перезагружены, поэтому окно запроса не растет со временем.
+        checked = self._meta("holds_checked_at")
+        if checked is None:
+            return 0
+
+        first, last, count = self._db.execute(
+            "SELECT MIN(operation_date), MAX(operation_date), COUNT(*) FROM operations "
+            "WHERE is_hold = 1 AND hold_end_date > ? AND hold_end_date <= ?", (int(checked), now)
+        ).fetchone()
+        if not count:
+            return 0
+
+        operations = api.iter_market_payments(start_date=datetime.fromtimestamp(first - _HOLD_MARGIN),
+                                              end_date=datetime.fromtimestamp(last + _HOLD_MARGIN))
+        self._store(operations)
+        return count
+
+    @staticmethod
+    def _where(operation_type: str = None, item_id: int = None, since: datetime | int = None,
+               until: datetime | int = None, is_hold: bool = None) -> tuple[str, list]:
+        conditions, args = [], []
+        if operation_type is not None:
+            conditions.append("operation_type = ?")
+            args.append(operation_type)
+        if item_id is not None:
+            conditions.append("item_id = ?")
+            args.append(item_id)
+        if since is not None:
+            conditions.append("operation_date >= ?")
+            args.append(timestamp(since))
+        if until is not None:
+            conditions.append("operation_date < ?")
+            args.append(timestamp(until))
+        if is_hold is not None:
+            conditions.append("is_hold = ?")
+            args.append(int(is_hold))
+
+        return (" WHERE " + " AND ".join(conditions)) if conditions else "", args
+
+    def operations(self, operation_type: str = None, item_id: int = None, since: datetime | int = None,
+                   until: datetime | int = None, is_hold: bool = None, limit: int = None) -> list[dict]:
+        """
+        Операции из базы, от новых к старым, в виде исходных словарей ответа API.
+        Для моделей: [types.Operation.parse_obj(raw) for raw in ledger.operations(...)]
+        :param operation_type: sold_item, paid_item, ...
+        :param item_id: ID аккаунта
+        :param since: Не раньше этой даты
+        :param until: Раньше этой даты
+        :param is_hold: Только холды (True) или только без холда (False)
+        :param limit: Максимум операций
+        """
+        where, args = self._where(operation_type, item_id, since, until, is_hold)
+        sql = f"SELECT raw FROM operations{where} ORDER BY operation_date DESC, operation_id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+
+        return [json.loads(row[0]) for row in self._db.execute(sql, args)]
+
+    def sum_by_day(self, operation_type: str = None, since: datetime | int = None,
+                   until: datetime | int = None, utc_offset: int = 0) -> list[tuple[str, int, int]]:
+        """
+        Приход и расход по дням: [(YYYY-MM-DD, incoming, outgoing), ...].
+        :param utc_offset: Смещение часового пояса дней в секундах (10800 для МСК)
+        """
+        where, args = self._where(operation_type, None, since, until)
+        sql = (f"SELECT date(operation_date + ?, 'unixepoch') AS day, SUM(incoming_sum), SUM(outgoing_sum) "
+               f"FROM operations{where} GROUP BY day ORDER BY day")
+
+        return [tuple(row) for row in self._db.execute(sql, [utc_offset, *args])]
+
+    def sum_by_type(self, since: datetime | int = None, until: datetime | int = None) -> dict[str, tuple[int, int]]:
+        """{operation_type: (incoming, outgoing)}"""
+        where, args = self._where(None, None, since, until)
+        sql = (f"SELECT operation_type, SUM(incoming_sum), SUM(outgoing_sum) FROM operations{where} "
+               f"GROUP BY operation_type")
+
+        return {row[0]: (row[1], row[2]) for row in self._db.execute(sql, args)}
+
+    def pending_holds(self) -> list[dict]:
+        """Холды, которые еще не закончились, в порядке окончания."""
+        sql = "SELECT raw FROM operations WHERE is_hold = 1 AND hold_end_date > ? ORDER BY hold_end_date"
+        return [json.loads(row[0]) for row in self._db.execute(sql, (int(time.time()),))]
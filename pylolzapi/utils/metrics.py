@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import bisect
+import contextvars
+import random
+import re
+import threading
+
+# Границы корзин гистограмм задержек, секунды.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+PHASES = ("connect", "ttfb", "download", "decode", "validate", "total")
+COUNTERS = ("requests", "errors", "retries")
+
+# Список, в который клиент дописывает задержки запросов текущего контекста (потока или задачи asyncio),
+# например шагов покупки в PurchaseExecutor. Остальные запросы клиента задержки не собирают.
+collected_timings: contextvars.ContextVar[list | None] = contextvars.ContextVar("pylolzapi_timings", default=None)
+
+_ID_RE = re.compile(r"(?<=/)\d+(?=/|$)")
+
+
+def endpoint_label(url: str) -> str:
+    """
+    Имя эндпоинта для метрик: числовые ID заменяются на {id}, чтобы не плодить серии.
+    :param url: Путь запроса без базового адреса, например market/123/reserve
+    """
+    return _ID_RE.sub("{id}", url.strip("/")) or "/"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float | None:
+        """Оценка перцентиля по границам корзин (верхняя граница корзины, в которую он попал)."""
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+
+        return float("inf")
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip(self.buckets + (float("inf"),), self.counts)),
+        }
+
+
+class _Endpoint:
+    __slots__ = ("counters", "phases")
+
+    def __init__(self, buckets: tuple):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.phases = {phase: Histogram(buckets) for phase in PHASES}
+
+
+class Metrics:
+    def __init__(self, sample_rate: float = 1.0, buckets: tuple = DEFAULT_BUCKETS):
+        """
+        Счетчики и гистограммы задержек по эндпоинтам. Потокобезопасен, можно общий на несколько клиентов.
+        Задержки делятся на фазы: connect - установка соединения, ttfb - до заголовков ответа,
+        download - загрузка тела, decode - разбор JSON, total - весь запрос с повторами,
+        validate - разбор записей ответа в модели Item/Operation (идет после запроса и в total не входит;
+        в итераторах страниц - по порциям записей, в AsyncLZTApi - по одной записи).
+        :param sample_rate: Доля запросов, для которых записываются задержки. Счетчики считаются всегда
+        :param buckets: Границы корзин гистограмм, секунды
+        """
+        self.sample_rate = sample_rate
+        self.buckets = tuple(buckets)
+
+        self._endpoints: dict[tuple[str, str], _Endpoint] = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, method: str, url: str) -> _Endpoint:
+        key = (method, endpoint_label(url))
+        endpoint = self._endpoints.get(key)
+        if endpoint is None:
+            with self._lock:
+                endpoint = self._endpoints.setdefault(key, _Endpoint(self.buckets))
+
+        return endpoint
+
+    def sampled(self) -> bool:
+        """Записывать ли задержки очередного запроса."""
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def count(self, method: str, url: str, counter: str, value: int = 1):
+        """
+        :param counter: requests, errors или retries
+        """
+        endpoint = self._endpoint(method, url)
+        with self._lock:
+            endpoint.counters[counter] += value
+
+    def observe(self, method: str, url: str, timings: dict):
+        """
+        :param timings: {фаза: секунды}, фазы из PHASES
+        """
+        endpoint = self._endpoint(method, url)
+        with self._lock:
+            for phase, seconds in timings.items():
+                endpoint.phases[phase].observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def as_dict(self) -> dict:
+        """{"GET market/{id}": {"requests": ..., "errors": ..., "retries": ..., "ttfb": {...}, ...}}"""
+        with self._lock:
+            return {
+                f"{method} {url}": {
+                    **endpoint.counters,
+                    **{phase: histogram.as_dict() for phase, histogram in endpoint.phases.items()},
+                }
+                for (method, url), endpoint in self._endpoints.items()
+            }
+
+    def prometheus(self, prefix: str = "pylolzapi") -> str:
+        """
+        Метрики в текстовом формате Prometheus.
+        :param prefix: Префикс имен метрик
+        """
+        lines = []
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+
+            for counter in COUNTERS:
+                name = f"{prefix}_{counter}_total"
+                lines.append(f"# TYPE {name} counter")
+                for (method, url), endpoint in endpoints:
+                    lines.append(f'{name}{{method="{method}",endpoint="{url}"}} {endpoint.counters[counter]}')
+
+            name = f"{prefix}_request_duration_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            for (method, url), endpoint in endpoints:
+                for phase, histogram in endpoint.phases.items():
+                    labels = f'method="{method}",endpoint="{url}",phase="{phase}"'
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
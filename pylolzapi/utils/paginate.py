@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+
+Page = tuple[list[dict], bool]
+
+
+def timestamp(value: datetime | int | None) -> int | None:
+    """Приводит дату к unix timestamp, как в полях *_date ответов API."""
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+
+    return value
+
+
+def has_next_page(resp: dict, page: int, key: str, count: int = None) -> bool:
+    """
+    Есть ли у ответа следующая страница.
+    :param resp: Ответ API
+    :param page: Номер текущей страницы
+    :param key: Ключ списка в ответе (items, payments)
+    :param count: Сколько записей было на странице, по умолчанию len(resp[key])
+    """
+    if count is None:
+        count = len(resp.get(key) or ())
+    if not count:
+        return False
+    if "hasNextPage" in resp:
+        return bool(resp["hasNextPage"])
+    if resp.get("totalItems") is not None and resp.get("perPage"):
+        return page * int(resp["perPage"]) < int(resp["totalItems"])
+
+    return True
+
+
+def prefetch(fetch: Callable[[int], Page], start: int = 1) -> Iterator[list[dict]]:
+    """
+    Отдает страницы по одной, загружая следующую в фоне, пока обрабатывается текущая.
+    В памяти не больше двух страниц.
+    :param fetch: fetch(page) -> (список записей, есть ли следующая страница)
+    :param start: Номер первой страницы
+    """
+    executor = ThreadPoolExecutor(1, thread_name_prefix="pylolzapi-prefetch")
+    try:
+        page = start
+        future = executor.submit(fetch, page)
+
+        while future is not None:
+            records, has_next = future.result()
+            page += 1
+            future = executor.submit(fetch, page) if has_next else None
+            yield records
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def aprefetch(fetch: Callable[[int], Awaitable[Page]], start: int = 1) -> AsyncIterator[list[dict]]:
+    """
+    Асинхронный вариант prefetch: следующая страница грузится отдельной задачей.
+    :param fetch: async fetch(page) -> (список записей, есть ли следующая страница)
+    :param start: Номер первой страницы
+    """
+    import asyncio
+
+    page = start
+    task = asyncio.ensure_future(fetch(page))
+    try:
+        while task is not None:
+            records, has_next = await task
+            page += 1
+            task = asyncio.ensure_future(fetch(page)) if has_next else None
+            yield records
+    finally:
+        if task is not None:
+            task.cancel()
+
+
+class PageCutoff:
+    def __init__(self, date_field: str, since: datetime | int = None, max_items: int = None,
+                 id_field: str = "item_id"):
+        """
+        Останавливает обход страниц по количеству записей или дате и убирает дубли,
+        которые появляются при сдвиге выдачи между страницами.
+        :param date_field: Поле даты записи (published_date, operation_date)
+        :param since: Не отдавать записи старше этой даты
+        :param max_items: Максимум записей
+        :param id_field: Поле ID записи (item_id, operation_id)
+        """
+        self.date_field = date_field
+        self.id_field = id_field
+        self.since = timestamp(since)
+        self.max_items = max_items
+        self.count = 0
+        self.done = False
+        self._previous: set = set()
+        self._current: set = set()
+        self._fresh = 0
+
+    def new_page(self):
+        """
+        Начало следующей страницы: дубли ищутся только среди записей предыдущей.
+        Если на предыдущей странице не было ни одной новой записи, выдача зациклилась и обход заканчивается.
+        """
+        if self._current and not self._fresh:
+            self.done = True
+
+        self._previous, self._current = self._current, set()
+        self._fresh = 0
+
+    def accept(self, record: dict) -> bool:
+        """
+        Нужно ли отдавать запись. Выставляет done, когда обход пора закончить.
+        :param record: Запись страницы
+        """
+        record_id = record.get(self.id_field)
+        self._current.add(record_id)
+        if record_id in self._previous:
+            return False
+
+        if self.since is not None and not record.get("is_sticky") \
+                and (record.get(self.date_field) or 0) < self.since:
+            self.done = True
+            return False
+
+        self._fresh += 1
+        self.count += 1
+        if self.max_items is not None and self.count >= self.max_items:
+            self.done = True
+
+        return True
+
+    def filter(self, records: Iterable[dict]) -> Iterator[dict]:
+        self.new_page()
+        if self.done:
+            return
+
+        for record in records:
+            if self.accept(record):
+                yield record
+            if self.done:
+                return
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import statistics
+import threading
+import time
+import warnings
+
+from collections import deque
+from typing import Any
+
+from pylolzapi.utils.exceptions import LolzAPIError, ServerError
+from pylolzapi.utils.metrics import collected_timings
+
+# Самая длинная серия запросов покупки: reserve, check_account и confirm_buy или cancel_reserve.
+_BURST = 3
+_NETWORK_PHASES = ("connect", "ttfb", "download", "decode")
+# Любой путь покупки: корзины лимитера у всех покупок общие.
+_PURCHASE_URL = "market/0/reserve"
+
+
+class PurchaseResult:
+    __slots__ = ("item_id", "ok", "steps", "error", "rolled_back", "reserve_left", "response")
+
+    def __init__(self, item_id: int):
+        """
+        :param item_id: ID аккаунта
+        """
+        self.item_id = item_id
+        self.ok = False
+        # [{"step", "seconds", "waited", "error", "requests": [задержки запросов шага, как в Metrics]}, ...]
+        # waited - сколько из seconds шаг ждал лимита запросов, а не сети
+        self.steps: list[dict] = []
+        self.error: Exception | None = None
+        self.rolled_back = False
+        # Остался ли висеть резерв: False - нет, True - да (отмена не удалась), None - неизвестно
+        # (резерв оборвался сетевой ошибкой или 5xx, и отмена тоже)
+        self.reserve_left: bool | None = False
+        self.response: dict | None = None
+
+    @property
+    def total(self) -> float:
+        """Секунд на все шаги, включая откат."""
+        return sum(step["seconds"] for step in self.steps)
+
+    @property
+    def timings(self) -> dict[str, float]:
+        """{шаг: секунды}"""
+        return {step["step"]: step["seconds"] for step in self.steps}
+
+    def __repr__(self):
+        steps = ", ".join(f"{step['step']}={step['seconds'] * 1000:.1f}ms" for step in self.steps)
+        return f"PurchaseResult(item_id={self.item_id!r}, ok={self.ok!r}, rolled_back={self.rolled_back!r}, {steps})"
+
+
+def _definite(error: Exception) -> bool:
+    """Ошибка API в ответ на запрос, то есть запрос точно не выполнен (в отличие от сетевой ошибки или 5xx)."""
+    return isinstance(error, LolzAPIError) and not isinstance(error, ServerError)
+
+
+class PurchaseExecutor:
+    def __init__(self, api, fast: bool = False, check: bool = True, warm_interval: float = None,
+                 history: int = 1000):
+        """
+        Покупка аккаунтов с минимальной задержкой: reserve -> check_account -> confirm_buy подряд без пауз
+        и без лишнего market_item, с временем каждого шага. Если после резерва что-то не удалось,
+        резерв снимается через market_cancel_reserve, в том числе если неизвестно, прошел ли сам резерв.
+        В RateLimiter клиента для покупок держится запас из трех запросов, который не тратят остальные запросы,
+        поэтому шаги не ждут лимита (время ожидания все равно видно в waited шага).
+        :param api: LZTApi или AsyncLZTApi
+        :param fast: Покупать одним запросом market_fast_buy вместо трех шагов
+        :param check: Проверять аккаунт перед подтверждением
+        :param warm_interval: Держать соединение открытым: прогревать его, если покупок не было столько секунд
+        (только LZTApi, None - не прогревать в фоне, только warm())
+        :param history: Сколько последних попыток хранить для stats()
+        """
+        self.api = api
+        self.fast = fast
+        self.check = check
+        self.attempts: deque[PurchaseResult] = deque(maxlen=history)
+
+        self._limiter = None
+        limiter = getattr(api, "_limiter", None)
+        if hasattr(limiter, "reserve_burst"):
+            limiter.reserve_burst(_PURCHASE_URL, _BURST)
+            self._limiter = limiter
+        elif limiter is not None:
+            warnings.warn(f"{type(limiter).__name__} не держит запас для покупок, шаги покупки будут ждать лимита",
+                          stacklevel=2)
+
+        self._last_used = time.monotonic()
+        self._stopped = threading.Event()
+
+        self._warmer = None
+        if warm_interval is not None:
+            self._warmer = threading.Thread(target=self._keep_warm, args=(warm_interval,),
+                                            name="pylolzapi-warm", daemon=True)
+            self._warmer.start()
+
+    def _keep_warm(self, interval: float):
+        while not self._stopped.wait(max(0.0, self._last_used + interval - time.monotonic())):
+            if time.monotonic() - self._last_used >= interval:
+                try:
+                    self.warm()
+                except Exception:
+                    # Не удалось - попробуем через interval, покупка все равно откроет соединение сама.
+                    self._last_used = time.monotonic()
+
+    def warm(self):
+        """Открывает соединение с API, чтобы покупка не ждала TCP и TLS. Для AsyncLZTApi - await api.warm()."""
+        self.api.warm()
+        self._last_used = time.monotonic()
+
+    def close(self):
+        """Останавливает фоновый прогрев и снимает запас для покупок в лимитере клиента."""
+        self._stopped.set()
+        limiter, self._limiter = self._limiter, None
+        if limiter is not None:
+            limiter.release_burst(_PURCHASE_URL, _BURST)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _target(self, item, price: int = None) -> tuple[int, int | None]:
+        item, price = self.api._reserve_target(item, price)
+        if price is None and not self.fast:
+            raise ValueError("Для резерва нужна цена: передайте Item или price, лишний market_item не делается")
+
+        return item, price
+
+    def _plan(self, item_id: int, price: int | None) -> list[tuple[str, str, tuple]]:
+        if self.fast:
+            return [("fast_buy", "market_fast_buy", (item_id,))]
+
+        steps = [("reserve", "market_reserve", (item_id, price))]
+        if self.check:
+            steps.append(("check_account", "market_check_account", (item_id,)))
+        steps.append(("confirm_buy", "market_confirm_buy", (item_id,)))
+        return steps
+
+    def _step(self, result: PurchaseResult, name: str, started: float, requests: list, error: Exception = None):
+        seconds = time.perf_counter() - started
+        network = sum(timings.get(phase, 0.0) for timings in requests for phase in _NETWORK_PHASES)
+        waited = max(0.0, seconds - network) if requests else 0.0
+        result.steps.append({"step": name, "seconds": seconds, "waited": waited,
+                             "error": str(error) if error is not None else None, "requests": requests})
+
+    @staticmethod
+    def _failed(result: PurchaseResult, name: str, error: Exception):
+        result.error = error
+        if name == "reserve":
+            result.reserve_left = False if _definite(error) else None
+
+    @staticmethod
+    def _cancel_failed(result: PurchaseResult, error: Exception) -> Exception:
+        if result.reserve_left is None and _definite(error):
+            # Резерв оборвался, а отменять нечего - значит, он не прошел.
+            result.reserve_left = False
+            return LolzAPIError(f"Не зарезервирован: {error}")
+
+        return error
+
+    def _finish(self, result: PurchaseResult) -> PurchaseResult:
+        self._last_used = time.monotonic()
+        self.attempts.append(result)
+        return result
+
+    def buy(self, item, price: int = None) -> PurchaseResult:
+        """
+        Покупает аккаунт. Ошибки не выбрасываются, а записываются в результат.
+        :param item: ID аккаунта или Item/ItemView (цена берется из него)
+        :param price: Цена резерва, если передан ID
+        """
+        item_id, price = self._target(item, price)
+        result = PurchaseResult(item_id)
+
+        for name, method, args in self._plan(item_id, price):
+            requests = []
+            token = collected_timings.set(requests)
+            started = time.perf_counter()
+            try:
+                result.response = getattr(self.api, method)(*args)
+            except Exception as e:
+                self._step(result, name, started, requests, e)
+                self._failed(result, name, e)
+                break
+            finally:
+                collected_timings.reset(token)
+            self._step(result, name, started, requests)
+            if name == "reserve":
+                result.reserve_left = True
+        else:
+            result.ok = True
+            result.reserve_left = False
+
+        if result.reserve_left is not False:
+            requests = []
+            token = collected_timings.set(requests)
+            started = time.perf_counter()
+            try:
+                self.api.market_cancel_reserve(item_id)
+                result.rolled_back = True
+                result.reserve_left = False
+                self._step(result, "cancel_reserve", started, requests)
+            except Exception as e:
+                self._step(result, "cancel_reserve", started, requests, self._cancel_failed(result, e))
+            finally:
+                collected_timings.reset(token)
+
+        return self._finish(result)
+
+    async def buy_async(self, item, price: int = None) -> PurchaseResult:
+        """То же, что buy, для AsyncLZTApi."""
+        item_id, price = self._target(item, price)
+        result = PurchaseResult(item_id)
+
+        for name, method, args in self._plan(item_id, price):
+            requests = []
+            token = collected_timings.set(requests)
+            started = time.perf_counter()
+            try:
+                result.response = await getattr(self.api, method)(*args)
+            except Exception as e:
+                self._step(result, name, started, requests, e)
+                self._failed(result, name, e)
+                break
+            finally:
+                collected_timings.reset(token)
+            self._step(result, name, started, requests)
+            if name == "reserve":
+                result.reserve_left = True
+        else:
+            result.ok = True
+            result.reserve_left = False
+
+        if result.reserve_left is not False:
+            requests = []
+            token = collected_timings.set(requests)
+            started = time.perf_counter()
+            try:
+                await self.api.market_cancel_reserve(item_id)
+                result.rolled_back = True
+                result.reserve_left = False
+                self._step(result, "cancel_reserve", started, requests)
+            except Exception as e:
+                self._step(result, "cancel_reserve", started, requests, self._cancel_failed(result, e))
+            finally:
+                collected_timings.reset(token)
+
+        return self._finish(result)
+
+    def stats(self) -> dict[str, Any]:
+        """Попытки, успешные, откаты и медиана/максимум времени каждого шага по последним попыткам, мс."""
+        steps: dict[str, list[float]] = {}
+        for result in self.attempts:
+            for step in result.steps:
+                steps.setdefault(step["step"], []).append(step["seconds"] * 1000)
+
+        return {
+            "attempts": len(self.attempts),
+            "ok": sum(result.ok for result in self.attempts),
+            "rolled_back": sum(result.rolled_back for result in self.attempts),
+            "reserve_left": sum(result.reserve_left is not False for result in self.attempts),
+            "api_errors": sum(isinstance(result.error, LolzAPIError) for result in self.attempts),
+            "steps": {name: {"median_ms": statistics.median(values), "max_ms": max(values)}
+                      for name, values in steps.items()},
+        }
@@ -0,0 +1,331 @@
+import bisect
+import itertools
+import re
+import threading
+import time
+
+
+class Priority:
+    HIGH: int = 0
+    NORMAL: int = 1
+    LOW: int = 2
+
+
+# Лимиты API: 20 запросов в минуту на поиск по маркету, 120 в минуту на остальное.
+DEFAULT_LIMITS = {
+    "search": (20, 60),
+    "item": (120, 60),
+    "payments": (120, 60),
+    "default": (120, 60),
+}
+DEFAULT_TOTAL = (120, 60)
+
+_PAYMENTS_RE = re.compile(r"^market/user/\d+/payments")
+_ITEM_RE = re.compile(r"^market/\d+")
+_SEARCH_RE = re.compile(r"^market(/[\w-]+)?/?$")
+_PURCHASE_RE = re.compile(r"^market/\d+/(fast-buy|confirm-buy|reserve|cancel-reserve|check-account)")
+
+
+def endpoint_class(url: str) -> str:
+    """
+    Класс эндпоинта для выбора корзины лимита: search, item, payments или default.
+    :param url: Путь запроса без базового адреса, например market/steam
+    """
+    if _PAYMENTS_RE.match(url):
+        return "payments"
+    if _ITEM_RE.match(url):
+        return "item"
+    if _SEARCH_RE.match(url):
+        return "search"
+    return "default"
+
+
+def endpoint_priority(url: str) -> int:
+    """
+    Приоритет запроса: покупки идут вне очереди.
+    :param url: Путь запроса без базового адреса
+    """
+    return Priority.HIGH if _PURCHASE_RE.match(url) else Priority.NORMAL
+
+
+class TokenBucket:
+    def __init__(self, calls: float, period: float = 1, burst: float = 1):
+        """
+        :param calls: Количество запросов
+        :param period: За сколько секунд
+        :param burst: Сколько запросов можно отправить подряд без ожидания
+        """
+        self.rate = calls / period
+        self.capacity = burst
+        self.tokens = burst
+        # Токены сверх burst, которые могут брать только запросы с приоритетом HIGH: наибольший из запасов.
+        self.reserved = 0.0
+        self._reservations: list[float] = []
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity + self.reserved, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float):
+        """Добавляет к корзине запас для запросов HIGH, средняя скорость остальных запросов не меняется."""
+        self._reservations.append(tokens)
+        if tokens > self.reserved:
+            self.tokens += tokens - self.reserved
+            self.reserved = tokens
+
+    def release(self, tokens: float):
+        """Снимает запас, добавленный reserve(tokens). Запасы других держателей остаются."""
+        if tokens in self._reservations:
+            self._reservations.remove(tokens)
+            self.reserved = max(self._reservations, default=0.0)
+            self.tokens = min(self.tokens, self.capacity + self.reserved)
+
+    def _needed(self, priority: int) -> float:
+        return 1 if priority == Priority.HIGH else 1 + self.reserved
+
+    def ready(self, now: float, priority: int = Priority.NORMAL) -> bool:
+        self._refill(now)
+        return self.tokens >= self._needed(priority)
+
+    def take(self):
+        self.tokens -= 1
+
+    def delay(self, now: float, priority: int = Priority.NORMAL) -> float:
+        """Сколько секунд ждать до следующего токена."""
+        self._refill(now)
+        return max(0.0, (self._needed(priority) - self.tokens) / self.rate)
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "buckets", "granted")
+
+    def __init__(self, priority: int, seq: int, buckets: tuple):
+        self.priority = priority
+        self.seq = seq
+        self.buckets = buckets
+        self.granted = False
+
+    def __lt__(self, other: "_Waiter"):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class RateLimiter:
+    def __init__(self, limits: dict = None, total: tuple = DEFAULT_TOTAL, burst: float = 1):
+        """
+        Планировщик запросов с отдельной корзиной токенов на каждый класс эндпоинтов.
+        Запросы ждут в общей очереди и отправляются в порядке приоритета, как только
+        у всех нужных корзин есть токен. Потокобезопасен, годится и для asyncio.
+        :param limits: {класс: (запросов, секунд)}, по умолчанию DEFAULT_LIMITS
+        :param total: Общий лимит на все запросы токена (запросов, секунд), None - без общего лимита
+        :param burst: Размер корзины
+        """
+        limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self._buckets = {name: TokenBucket(calls, period, burst) for name, (calls, period) in limits.items()}
+        self._total = TokenBucket(total[0], total[1], burst) if total is not None else None
+
+        self._cond = threading.Condition()
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+
+    def _buckets_for(self, url: str) -> tuple:
+        bucket = self._buckets.get(endpoint_class(url), self._buckets["default"])
+        return (bucket, self._total) if self._total is not None else (bucket,)
+
+    def _enqueue(self, url: str, priority: int = None) -> _Waiter:
+        buckets = self._buckets_for(url)
+        priority = endpoint_priority(url) if priority is None else priority
+
+        waiter = _Waiter(priority, next(self._seq), buckets)
+        bisect.insort(self._waiters, waiter)
+        return waiter
+
+    def _dispatch(self, now: float) -> bool:
+        granted = False
+
+        for waiter in self._waiters:
+            if all(bucket.ready(now, waiter.priority) for bucket in waiter.buckets):
+                for bucket in waiter.buckets:
+                    bucket.take()
+                waiter.granted = granted = True
+
+        if granted:
+            self._waiters = [waiter for waiter in self._waiters if not waiter.granted]
+
+        return granted
+
+    @staticmethod
+    def _delay(waiter: _Waiter, now: float) -> float:
+        return max(max(bucket.delay(now, waiter.priority) for bucket in waiter.buckets), 0.001)
+
+    def delay(self, url: str) -> float:
+        """
+        Примерное ожидание нового запроса к url: до следующего токена плюс уже стоящие в очереди.
+        :param url: Путь запроса без базового адреса
+        """
+        with self._cond:
+            now = time.monotonic()
+            buckets = self._buckets_for(url)
+            wait = max(bucket.delay(now, endpoint_priority(url)) for bucket in buckets)
+            return wait + len(self._waiters) / min(bucket.rate for bucket in buckets)
+
+    def reserve_burst(self, url: str, tokens: int):
+        """
+        Держит в корзинах url запас, чтобы серия из tokens запросов HIGH (покупки) шла подряд без ожидания,
+        если перед ней было tokens / rate секунд без таких запросов. Остальные запросы этот запас не берут,
+        поэтому средняя скорость всех запросов остается в пределах лимита.
+        :param url: Путь запроса без базового адреса, например market/1/reserve
+        :param tokens: Длина серии
+        """
+        with self._cond:
+            for bucket in self._buckets_for(url):
+                bucket.reserve(max(0.0, tokens - bucket.capacity))
+
+    def release_burst(self, url: str, tokens: int):
+        """
+        Снимает запас, добавленный reserve_burst с теми же аргументами.
+        :param url: Путь запроса без базового адреса
+        :param tokens: Длина серии, как в reserve_burst
+        """
+        with self._cond:
+            for bucket in self._buckets_for(url):
+                bucket.release(max(0.0, tokens - bucket.capacity))
+            # Обычные запросы могли ждать, пока корзина наполнится до запаса.
+            self._cond.notify_all()
+
+    def acquire(self, url: str, priority: int = None):
+        """
+        Блокирует поток, пока запрос не может быть отправлен.
+        :param url: Путь запроса без базового адреса
+        :param priority: Priority, по умолчанию определяется по эндпоинту
+        """
+        with self._cond:
+            waiter = self._enqueue(url, priority)
+
+            while True:
+                now = time.monotonic()
+                if self._dispatch(now):
+                    self._cond.notify_all()
+                if waiter.granted:
+                    return
+
+                self._cond.wait(self._delay(waiter, now))
+
+    async def acquire_async(self, url: str, priority: int = None):
+        """
+        То же, что acquire, но не блокирует event loop.
+        :param url: Путь запроса без базового адреса
+        :param priority: Priority, по умолчанию определяется по эндпоинту
+        """
+        import asyncio
+
+        with self._cond:
+            waiter = self._enqueue(url, priority)
+
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    if self._dispatch(now):
+                        self._cond.notify_all()
+                    if waiter.granted:
+                        return
+
+                    delay = self._delay(waiter, now)
+
+                await asyncio.sleep(delay)
+        finally:
+            with self._cond:
+                if not waiter.granted:
+                    self._waiters.remove(waiter)
+
+
+class SharedRateLimiter:
+    def __init__(self, limits: dict = None, total: tuple = DEFAULT_TOTAL, burst: float = 1, context=None):
+        """
+        Лимиты как у RateLimiter, но общие для нескольких процессов: корзины лежат в разделяемой памяти.
+        Передается в процессы при создании (аргументом Process или initializer пула процессов).
+        Приоритеты между процессами не учитываются: запрос ждет, пока у его корзин не появится токен.
+        :param limits: {класс: (запросов, секунд)}, по умолчанию DEFAULT_LIMITS
+        :param total: Общий лимит на все запросы токена (запросов, секунд), None - без общего лимита
+        :param burst: Размер корзины
+        :param context: Контекст multiprocessing (get_context("spawn"), ...), по умолчанию стандартный
+        """
+        import multiprocessing
+
+        context = context or multiprocessing
+        limits = {**DEFAULT_LIMITS, **(limits or {})}
+        if total is not None:
+            limits["__total__"] = total
+
+        self._index = {name: i for i, name in enumerate(limits)}
+        self._rates = tuple(calls / period for calls, period in limits.values())
+        self._burst = burst
+        # Для каждой корзины пара (токены, время пополнения по time.monotonic, общему для процессов).
+        self._state = context.RawArray("d", 2 * len(limits))
+        self._lock = context.Lock()
+
+        now = time.monotonic()
+        for i in range(len(limits)):
+            self._state[2 * i] = burst
+            self._state[2 * i + 1] = now
+
+    def _buckets_for(self, url: str) -> tuple[int, ...]:
+        bucket = self._index.get(endpoint_class(url), self._index["default"])
+        total = self._index.get("__total__")
+        return (bucket, total) if total is not None else (bucket,)
+
+    def _refill(self, bucket: int, now: float) -> float:
+        state = self._state
+        tokens = min(self._burst, state[2 * bucket] + (now - state[2 * bucket + 1]) * self._rates[bucket])
+        state[2 * bucket], state[2 * bucket + 1] = tokens, now
+        return tokens
+
+    def _take(self, url: str) -> float:
+        """Берет токен и возвращает 0 или, если токенов нет, сколько секунд ждать."""
+        buckets = self._buckets_for(url)
+        with self._lock:
+            now = time.monotonic()
+            wait = max((1 - self._refill(bucket, now)) / self._rates[bucket] for bucket in buckets)
+            if wait > 0:
+                return max(wait, 0.001)
+            for bucket in buckets:
+                self._state[2 * bucket] -= 1
+
+        return 0.0
+
+    def delay(self, url: str) -> float:
+        """
+        Примерное ожидание нового запроса к url до следующего токена.
+        :param url: Путь запроса без базового адреса
+        """
+        buckets = self._buckets_for(url)
+        with self._lock:
+            now = time.monotonic()
+            return max(max(0.0, (1 - self._refill(bucket, now)) / self._rates[bucket]) for bucket in buckets)
+
+    def acquire(self, url: str, priority: int = None):
+        """
+        Блокирует поток, пока запрос не может быть отправлен.
+        :param url: Путь запроса без базового адреса
+        :param priority: Не используется, для совместимости с RateLimiter
+        """
+        while True:
+            wait = self._take(url)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, url: str, priority: int = None):
+        """
+        То же, что acquire, но не блокирует event loop.
+        :param url: Путь запроса без базового адреса
+        :param priority: Не используется, для совместимости с RateLimiter
+        """
+        import asyncio
+
+        while True:
+            wait = self._take(url)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import random
+import re
+import threading
+import time
+
+from email.utils import parsedate_to_datetime
+
+from pylolzapi.utils.exceptions import CircuitOpenError
+
+# Покупки, переводы и прочие операции с деньгами не повторяются ни при каких настройках.
+NEVER_RETRY = re.compile(r"^market/(\d+/(fast-buy|confirm-buy|reserve|check-account)|balance/transfer|item/add)")
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Значение заголовка Retry-After в секундах.
+    :param value: Секунды или HTTP дата
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    def __init__(self, retries: int = 3, backoff: float = 0.5, max_backoff: float = 30,
+                 statuses: tuple = (429, 500, 502, 503, 504), methods: tuple = ("GET",)):
+        """
+        Повтор запросов при сетевых ошибках и временных ответах API.
+        Пауза растет экспоненциально со случайным разбросом, Retry-After учитывается.
+        :param retries: Сколько раз повторять
+        :param backoff: Пауза перед первым повтором
+        :param max_backoff: Максимальная пауза (в том числе из Retry-After)
+        :param statuses: HTTP статусы, после которых запрос повторяется
+        :param methods: Методы, которые безопасно повторять. Эндпоинты из NEVER_RETRY не повторяются никогда
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+
+    def attempts(self, method: str, url: str) -> int:
+        """
+        Сколько повторов разрешено для запроса.
+        :param method: HTTP метод
+        :param url: Путь запроса без базового адреса
+        """
+        if method.upper() not in self.methods or NEVER_RETRY.match(url):
+            return 0
+
+        return self.retries
+
+    def delay(self, attempt: int, retry_after: str = None) -> float:
+        """
+        Пауза перед повтором.
+        :param attempt: Номер неудачной попытки, с 0
+        :param retry_after: Заголовок Retry-After ответа
+        """
+        server = parse_retry_after(retry_after)
+        if server is not None:
+            return min(server, self.max_backoff)
+
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30):
+        """
+        После failure_threshold сетевых ошибок или 5xx подряд перестает пускать запросы
+        и сразу поднимает CircuitOpenError. Через recovery_timeout пропускает один пробный запрос:
+        успех закрывает цепь, ошибка снова открывает. Потокобезопасен, можно делить между клиентами.
+        :param failure_threshold: Ошибок подряд до размыкания
+        :param recovery_timeout: Сколько секунд не пускать запросы
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """closed, open или half-open."""
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.recovery_timeout:
+            return "half-open"
+        return "open"
+
+    def check(self) -> bool:
+        """
+        Поднимает CircuitOpenError, если запрос сейчас отправлять нельзя.
+        :return: True, если этот запрос - пробный. Пробный запрос должен закончиться success(), failure()
+        или, если он не дошел до API (отменен, ошибка в хуке), release()
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+
+            remaining = self.recovery_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._probing:
+                raise CircuitOpenError(f"API недоступно, повторите через {max(remaining, 0):.1f} с")
+
+            self._probing = True
+            return True
+
+    def release(self):
+        """Пробный запрос не состоялся: следующий запрос снова может стать пробным."""
+        with self._lock:
+            self._probing = False
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import multiprocessing
+import queue
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+
+from pylolzapi.types.categories import CATEGORY_PATHS
+from pylolzapi.utils.ratelimit import SharedRateLimiter
+
+
+class Shard:
+    __slots__ = ("category", "pmin", "pmax")
+
+    def __init__(self, category: str, pmin: int = None, pmax: int = None):
+        """
+        Часть поиска для одного процесса: категория и полоса цен.
+        :param category: Категория в пути запроса (steam, telegram, ...)
+        :param pmin: Минимальная цена
+        :param pmax: Максимальная цена
+        """
+        self.category = category
+        self.pmin = pmin
+        self.pmax = pmax
+
+    def __repr__(self):
+        return f"Shard({self.category!r}, pmin={self.pmin!r}, pmax={self.pmax!r})"
+
+
+def price_bands(edges: Iterable[int]) -> list[tuple[int | None, int | None]]:
+    """
+    Полосы цен между границами: [100, 500] -> [(None, 100), (100, 500), (500, None)].
+    Аккаунт с ценой ровно на границе попадает в обе полосы, MarketScanner убирает такие повторы.
+    :param edges: Границы по возрастанию
+    """
+    edges = [None, *sorted(edges), None]
+    return list(zip(edges, edges[1:]))
+
+
+# Состояние процесса-исполнителя: клиент, очередь результатов и флаг остановки.
+_worker: dict = {}
+
+
+def _init_worker(token: str, limiter, results, stop, api_kwargs: dict):
+    from pylolzapi.api.sync import LZTApi
+
+    _worker["api"] = LZTApi(token, rate_limiter=limiter if limiter is not None else False, **api_kwargs)
+    _worker["results"] = results
+    _worker["stop"] = stop
+
+
+def _scan(index: int, shard: Shard, params: dict, batch: int):
+    api, results, stop = _worker["api"], _worker["results"], _worker["stop"]
+    started = time.monotonic()
+    count, error, items = 0, None, []
+
+    try:
+        for item in api.iter_market_list(shard.category, shard.pmin, shard.pmax, **params):
+            items.append(item)
+            count += 1
+            if len(items) >= batch:
+                results.put((index, items, None))
+                items = []
+                if stop.is_set():
+                    break
+    except Exception as e:
+        # Исключение может не пройти pickle, поэтому в главный процесс уходит текст.
+        error = f"{type(e).__name__}: {e}"
+
+    if items:
+        results.put((index, items, None))
+    results.put((index, None, {"items": count, "elapsed": time.monotonic() - started, "error": error}))
+
+
+class MarketScanner:
+    def __init__(self, token: str, categories: Iterable[str | int], bands: Iterable[tuple] = ((None, None),),
+                 processes: int = None, limiter: SharedRateLimiter | bool = True, title: str = None,
+                 optional: dict = None, max_items: int = None, batch: int = 100, context=None, **api_kwargs):
+        """
+        Поиск по маркету в нескольких процессах: каждая пара категория + полоса цен (Shard) обходится
+        в своем процессе со своей сессией, разбор аккаунтов в модели идет параллельно на всех ядрах.
+        Результаты объединяются без повторов по item_id. Модели категорий, зарегистрированные в главном
+        процессе, видны исполнителям только при fork, в остальных случаях их нужно регистрировать при импорте.
+        :param token: Токен
+        :param categories: Категории: пути (steam) или MarketCategories
+        :param bands: Полосы цен (pmin, pmax), см. price_bands(). По умолчанию без фильтра цены
+        :param processes: Число процессов, по умолчанию по числу ядер
+        :param limiter: SharedRateLimiter, общий для всех процессов, True - лимиты API по умолчанию, False - без
+        :param title: Название аккаунта
+        :param optional: Дополнительные параметры поиска
+        :param max_items: Максимум аккаунтов на Shard
+        :param batch: Сколько аккаунтов процесс отправляет за раз
+        :param context: Контекст multiprocessing, по умолчанию стандартный
+        :param api_kwargs: Параметры LZTApi в процессах. decode="lazy" не поддерживается:
+        представления не передаются между процессами
+        """
+        if api_kwargs.get("decode") == "lazy":
+            raise ValueError("MarketScanner передает аккаунты между процессами, decode=\"lazy\" не поддерживается")
+
+        self.token = token
+        self.shards = [Shard(CATEGORY_PATHS[category] if isinstance(category, int) else category, pmin, pmax)
+                       for category in categories for pmin, pmax in bands]
+        self.processes = processes
+        self.batch = batch
+        self.params = {"title": title, "optional": optional, "max_items": max_items}
+        self.api_kwargs = api_kwargs
+        self.stats = {"items": 0, "duplicates": 0, "shards": {}}
+
+        self._context = context or multiprocessing.get_context()
+        if limiter is True:
+            limiter = SharedRateLimiter(context=self._context)
+        self.limiter: SharedRateLimiter | None = limiter if limiter is not False else None
+
+    def __iter__(self):
+        return self.items()
+
+    @property
+    def errors(self) -> dict[Shard, str]:
+        """Shard, обход которых прервался ошибкой: {shard: текст ошибки}."""
+        return {shard: stats["error"] for shard, stats in self.stats["shards"].items() if stats["error"]}
+
+    def items(self) -> Iterator:
+        """
+        Отдает аккаунты по мере загрузки, без повторов. Ошибка в одном Shard не прерывает остальные,
+        она записывается в errors. Если перестать читать раньше, процессы останавливаются после текущей пачки.
+        """
+        results = self._context.Queue()
+        stop = self._context.Event()
+        seen = set()
+        finished = set()
+        self.stats = {"items": 0, "duplicates": 0, "shards": {}}
+
+        executor = ProcessPoolExecutor(self.processes, mp_context=self._context, initializer=_init_worker,
+                                       initargs=(self.token, self.limiter, results, stop, self.api_kwargs))
+        futures = {executor.submit(_scan, index, shard, self.params, self.batch): index
+                   for index, shard in enumerate(self.shards)}
+
+        def finish(index: int, stats: dict):
+            finished.add(index)
+            self.stats["shards"][self.shards[index]] = stats
+
+        def receive(timeout: float):
+            try:
+                index, items, stats = results.get(timeout=timeout)
+            except queue.Empty:
+                # Процесс мог упасть, не отправив итог.
+                for future, index in futures.items():
+                    if index not in finished and future.done() and future.exception() is not None:
+                        finish(index, {"items": 0, "elapsed": 0.0, "error": repr(future.exception())})
+                return None
+
+            if items is None:
+                finish(index, stats)
+            return items
+
+        try:
+            while len(finished) < len(self.shards):
+                for item in receive(0.1) or ():
+                    if item.item_id in seen:
+                        self.stats["duplicates"] += 1
+                        continue
+                    seen.add(item.item_id)
+                    self.stats["items"] += 1
+                    yield item
+        finally:
+            if len(finished) < len(self.shards):
+                stop.set()
+                for future in futures:
+                    future.cancel()
+                # Исполнители не завершатся, пока их пачки не вычитаны из очереди.
+                while not all(future.done() for future in futures) or not results.empty():
+                    receive(0.1)
+            executor.shutdown(wait=True)
+
+    def index(self):
+        """Все аккаунты поиска в ItemIndex (колонки NumPy). Требует numpy: pip install pylolzapi[analytics]"""
+        from pylolzapi.utils.index import ItemIndex
+
+        index = ItemIndex()
+        items = []
+        for item in self.items():
+            items.append(item)
+            if len(items) >= self.batch:
+                index.extend(items)
+                items = []
+        index.extend(items)
+        return index
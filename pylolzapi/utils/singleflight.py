@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import threading
+
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Объединяет одинаковые одновременные вызовы: пока запрос с ключом выполняется,
+        остальные потоки с тем же ключом ждут его результат (или исключение), а не повторяют запрос.
+        """
+        self._calls: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Выполняет fn или ждет уже выполняющийся вызов с тем же ключом.
+        :param key: Ключ запроса
+        :param fn: Функция без аргументов
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+
+        if not leader:
+            return call.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def __len__(self):
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    def __init__(self):
+        """
+        Асинхронный вариант SingleFlight. Запрос выполняется отдельной задачей,
+        поэтому отмена одного из ожидающих не отменяет его для остальных.
+        """
+        self._calls: dict[Hashable, Any] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет fn или ждет уже выполняющийся вызов с тем же ключом.
+        :param key: Ключ запроса
+        :param fn: Корутинная функция без аргументов
+        """
+        import asyncio
+
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+
+            def done(_):
+                if self._calls.get(key) is task:
+                    del self._calls[key]
+
+            task.add_done_callback(done)
+
+        return await asyncio.shield(task)
+
+    def __len__(self):
+        return len(self._calls)
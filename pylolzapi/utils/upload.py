@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator
+
+from pylolzapi.utils.exceptions import LolzAPIError, ServerError
+
+
+class UploadResult:
+    __slots__ = ("key", "status", "item_id", "error", "add_time", "check_time")
+
+    CHECKED = "checked"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+    UNKNOWN = "unknown"
+
+    def __init__(self, key: str, status: str, item_id: int = None, error: str = None,
+                 add_time: float = None, check_time: float = None):
+        """
+        :param key: Ключ аккаунта из входных данных
+        :param status: checked - добавлен и проверен, failed - ошибка API, skipped - уже проверен в прошлом запуске,
+        unknown - запрос на добавление оборвался или получил 5xx, создан ли аккаунт на маркете неизвестно
+        (нужна ручная проверка)
+        :param item_id: ID созданного аккаунта
+        :param error: Текст ошибки
+        :param add_time: Секунд на market_add_item
+        :param check_time: Секунд на market_add_item_check
+        """
+        self.key = key
+        self.status = status
+        self.item_id = item_id
+        self.error = error
+        self.add_time = add_time
+        self.check_time = check_time
+
+    def __repr__(self):
+        return f"UploadResult(key={self.key!r}, status={self.status!r}, item_id={self.item_id!r})"
+
+
+class UploadJournal:
+    def __init__(self, path: str, fsync: bool = True):
+        """
+        Журнал загрузки в JSON Lines: по строке на каждый шаг, дописывается сразу.
+        :param path: Файл журнала
+        :param fsync: Сбрасывать каждую запись на диск
+        """
+        self.path = path
+        self.fsync = fsync
+        self.state: dict[str, dict] = {}
+
+        if os.path.exists(path):
+            self._load(path)
+
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def _load(self, path: str):
+        with open(path, "rb") as f:
+            data = f.read()
+
+        offset = 0
+        for line in data.splitlines(keepends=True):
+            if line.strip():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    if data[offset + len(line):].strip():
+                        raise ValueError(f"Журнал {path} поврежден: строка с позиции {offset} не JSON")
+                    # Падение посреди записи оставляет оборванную последнюю строку: шаг не записан.
+                    with open(path, "r+b") as f:
+                        f.truncate(offset)
+                    return
+                self.state.setdefault(entry["key"], {}).update(entry)
+            offset += len(line)
+
+        if data and not data.endswith(b"\n"):
+            # Последняя строка цела, но без перевода строки - следующая запись не должна к ней прилипнуть.
+            with open(path, "ab") as f:
+                f.write(b"\n")
+
+    def write(self, key: str, stage: str, **fields):
+        entry = {"key": key, "stage": stage, "time": time.time(), **fields}
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.state.setdefault(key, {}).update(entry)
+
+    def close(self):
+        self._file.close()
+
+
+def _item_id(resp: dict) -> int | None:
+    item = resp.get("item")
+    if isinstance(item, dict) and item.get("item_id"):
+        return item["item_id"]
+
+    return resp.get("item_id")
+
+
+class BulkUpload:
+    def __init__(self, api, journal: str = "upload.jsonl", concurrency: int = 4, fsync: bool = True):
+        """
+        Загрузка пачки аккаунтов: market_add_item и market_add_item_check для разных аккаунтов идут параллельно.
+        Каждый шаг пишется в журнал, поэтому после падения повторный run() с тем же журналом
+        не добавляет уже созданные аккаунты, а только проверяет недопроверенные.
+        :param api: LZTApi
+        :param journal: Файл журнала
+        :param concurrency: Сколько аккаунтов загружается одновременно
+        :param fsync: Сбрасывать журнал на диск после каждого шага
+        """
+        self.api = api
+        self.journal = UploadJournal(journal, fsync)
+        self.concurrency = concurrency
+        self.stats = {UploadResult.CHECKED: 0, UploadResult.FAILED: 0, UploadResult.SKIPPED: 0,
+                      UploadResult.UNKNOWN: 0, "elapsed": 0.0, "per_minute": 0.0}
+
+    def close(self):
+        self.journal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _upload(self, listing: dict) -> UploadResult:
+        key = listing["key"]
+        state = self.journal.state.get(key, {})
+        stage = state.get("stage")
+
+        if stage == "checked":
+            return UploadResult(key, UploadResult.SKIPPED, state.get("item_id"))
+        if stage == "adding":
+            return UploadResult(key, UploadResult.UNKNOWN, error="Добавление прервано в прошлом запуске")
+
+        add_time = None
+        item_id = state.get("item_id")
+        if item_id is None:
+            self.journal.write(key, "adding")
+            started = time.perf_counter()
+            try:
+                resp = self.api.market_add_item(**listing["add"])
+            except ServerError as e:
+                # 5xx или HTML страница прокси: аккаунт мог быть создан, как и при сетевой ошибке.
+                return UploadResult(key, UploadResult.UNKNOWN, error=str(e))
+            except LolzAPIError as e:
+                self.journal.write(key, "add_failed", error=str(e))
+                return UploadResult(key, UploadResult.FAILED, error=str(e))
+            except Exception as e:
+                # Сетевая ошибка: аккаунт мог быть создан, повторное добавление сделает дубль.
+                return UploadResult(key, UploadResult.UNKNOWN, error=str(e))
+
+            add_time = time.perf_counter() - started
+            item_id = _item_id(resp)
+            if item_id is None:
+                return UploadResult(key, UploadResult.UNKNOWN, error=f"В ответе нет item_id: {resp}",
+                                    add_time=add_time)
+            self.journal.write(key, "added", item_id=item_id)
+
+        started = time.perf_counter()
+        try:
+            self.api.market_add_item_check(item_id, **listing.get("check", {}))
+        except Exception as e:
+            self.journal.write(key, "check_failed", item_id=item_id, error=str(e))
+            return UploadResult(key, UploadResult.FAILED, item_id, str(e), add_time, time.perf_counter() - started)
+
+        check_time = time.perf_counter() - started
+        self.journal.write(key, "checked", item_id=item_id)
+        return UploadResult(key, UploadResult.CHECKED, item_id, None, add_time, check_time)
+
+    def run(self, listings: Iterable[dict]) -> Iterator[UploadResult]:
+        """
+        Загружает аккаунты и отдает результаты по мере готовности.
+        :param listings: [{"key": уникальный ключ аккаунта, "add": параметры market_add_item,
+        "check": параметры market_add_item_check без item}, ...]
+        """
+        started = time.monotonic()
+        listings = iter(listings)
+        pending = set()
+
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="pylolzapi-upload") as executor:
+            while True:
+                # Не больше двух аккаунтов на поток в очереди: listings может быть генератором.
+                for listing in listings:
+                    pending.add(executor.submit(self._upload, listing))
+                    if len(pending) >= self.concurrency * 2:
+                        break
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    self.stats[result.status] += 1
+                    self.stats["elapsed"] = elapsed = time.monotonic() - started
+                    uploaded = self.stats[UploadResult.CHECKED]
+                    self.stats["per_minute"] = uploaded / elapsed * 60 if elapsed else 0.0
+                    yield result
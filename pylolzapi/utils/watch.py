@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import time
+
+from collections import OrderedDict, deque
+from typing import Any, Callable, Iterator, AsyncIterator
+
+
+class WatchEvent:
+    __slots__ = ("item", "kind", "old_price", "latency", "detected_at")
+
+    NEW = "new"
+    PRICE = "price"
+    BUMP = "bump"
+
+    def __init__(self, item: Any, kind: str, old_price: int | None, latency: float | None, detected_at: float):
+        """
+        :param item: Item (или ItemView при decode="lazy")
+        :param kind: new - новый аккаунт, price - изменилась цена, bump - аккаунт подняли
+        :param old_price: Прошлая цена для price
+        :param latency: Секунд от публикации/поднятия до обнаружения
+        :param detected_at: Время обнаружения (unix timestamp)
+        """
+        self.item = item
+        self.kind = kind
+        self.old_price = old_price
+        self.latency = latency
+        self.detected_at = detected_at
+
+    def __repr__(self):
+        return f"WatchEvent(kind={self.kind!r}, item_id={self.item.item_id!r}, latency={self.latency!r})"
+
+
+class WatchStats:
+    def __init__(self, window: int = 1000):
+        """
+        Счетчики и задержки обнаружения по последним window событиям.
+        :param window: Сколько последних замеров хранить для перцентилей
+        """
+        self.polls = 0
+        self.errors = 0
+        self.events = {WatchEvent.NEW: 0, WatchEvent.PRICE: 0, WatchEvent.BUMP: 0}
+        self.interval = 0.0
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.poll_times: deque[float] = deque(maxlen=window)
+
+    @staticmethod
+    def _percentile(values, q: float) -> float | None:
+        if not values:
+            return None
+        values = sorted(values)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def as_dict(self) -> dict:
+        return {
+            "polls": self.polls,
+            "errors": self.errors,
+            "events": dict(self.events),
+            "interval": self.interval,
+            "latency_p50": self._percentile(self.latencies, 0.5),
+            "latency_p95": self._percentile(self.latencies, 0.95),
+            "latency_max": max(self.latencies, default=None),
+            "poll_p50": self._percentile(self.poll_times, 0.5),
+            "poll_p95": self._percentile(self.poll_times, 0.95),
+        }
+
+
+class MarketWatch:
+    def __init__(self, api, url: str, params: dict = None, interval: float = 5,
+                 min_interval: float = 3, max_interval: float = 30, seen_size: int = 10000,
+                 bumps: bool = False, emit_existing: bool = False, ignore_errors: bool = False):
+        """
+        Опрос market_list с поиском новых и подешевевших/подорожавших аккаунтов.
+        Интервал сокращается, пока появляются новые аккаунты, и растет, пока их нет.
+        Разбираются только новые аккаунты, уже виденные пропускаются по item_id.
+        :param api: LZTApi или AsyncLZTApi
+        :param url: Путь поиска (market или market/{category})
+        :param params: Параметры поиска
+        :param interval: Начальный интервал опроса, секунды
+        :param min_interval: Минимальный интервал
+        :param max_interval: Максимальный интервал
+        :param seen_size: Сколько item_id помнить (самые давние забываются)
+        :param bumps: Отдавать события о поднятии аккаунтов
+        :param emit_existing: Отдавать аккаунты с первого опроса, а не только появившиеся после запуска
+        :param ignore_errors: Не прерывать опрос при ошибках, а увеличивать интервал
+        """
+        self.api = api
+        self.url = url
+        self.params = params
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.seen_size = seen_size
+        self.bumps = bumps
+        self.emit_existing = emit_existing
+        self.ignore_errors = ignore_errors
+        self.stats = WatchStats()
+
+        self._seen: OrderedDict[int, tuple] = OrderedDict()
+        self._first = True
+        self._stopped = False
+
+    def stop(self):
+        """Останавливает опрос после текущей итерации."""
+        self._stopped = True
+
+    def _process(self, resp: dict, elapsed: float) -> list[WatchEvent]:
+        now = time.time()
+        events = []
+
+        records = resp.get("items") or ()
+        for raw in records:
+            item_id = raw.get("item_id")
+            state = (raw.get("price"), raw.get("refreshed_date"))
+            previous = self._seen.get(item_id)
+            self._seen[item_id] = state
+            self._seen.move_to_end(item_id)
+
+            if previous is None:
+                kind = WatchEvent.NEW if not self._first or self.emit_existing else None
+            elif previous[0] != state[0]:
+                kind = WatchEvent.PRICE
+            elif self.bumps and previous[1] != state[1]:
+                kind = WatchEvent.BUMP
+            else:
+                kind = None
+
+            if kind is None:
+                continue
+
+            moment = max(raw.get("published_date") or 0, raw.get("refreshed_date") or 0)
+            latency = now - moment if moment and kind != WatchEvent.PRICE else None
+            if latency is not None:
+                self.stats.latencies.append(latency)
+            self.stats.events[kind] += 1
+            events.append(WatchEvent(self.api._item(raw), kind, previous[0] if previous else None, latency, now))
+
+        # Аккаунты текущей страницы не вытесняются, иначе они вернутся как новые на следующем опросе.
+        while len(self._seen) > max(self.seen_size, len(records)):
+            self._seen.popitem(last=False)
+
+        self._first = False
+        self.stats.polls += 1
+        self.stats.poll_times.append(elapsed)
+        self._adapt(bool(events))
+        return events
+
+    def _adapt(self, found: bool):
+        if found:
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        self.stats.interval = self.interval
+
+    def _failed(self, error: Exception):
+        self.stats.errors += 1
+        self._adapt(False)
+        if not self.ignore_errors:
+            raise error
+
+    def __iter__(self) -> Iterator[WatchEvent]:
+        while not self._stopped:
+            started = time.monotonic()
+            try:
+                resp = self.api._get(self.url, params=self.params)
+            except Exception as e:
+                self._failed(e)
+            else:
+                yield from self._process(resp, time.monotonic() - started)
+
+            if not self._stopped:
+                time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    async def __aiter__(self) -> AsyncIterator[WatchEvent]:
+        import asyncio
+
+        while not self._stopped:
+            started = time.monotonic()
+            try:
+                resp = await self.api._get(self.url, params=self.params)
+            except Exception as e:
+                self._failed(e)
+            else:
+                for event in self._process(resp, time.monotonic() - started):
+                    yield event
+
+            if not self._stopped:
+                await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def run(self, callback: Callable[[WatchEvent], Any]):
+        """
+        Опрашивает маркет до stop() и вызывает callback на каждое событие.
+        :param callback: callback(event)
+        """
+        for event in self:
+            callback(event)
+
+    async def run_async(self, callback: Callable[[WatchEvent], Any]):
+        """
+        То же, что run, для AsyncLZTApi. callback может быть корутиной.
+        :param callback: callback(event)
+        """
+        import inspect
+
+        async for event in self:
+            result = callback(event)
+            if inspect.isawaitable(result):
+                await result
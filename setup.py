@@ -17,6 +17,12 @@ setuptools.setup(
 		"Operating System :: OS Independent",
 	],
 	install_requires=['requests~=2.28.1\n', 'DateTime~=4.7\n', 'pydantic~=1.9.1'],
+	extras_require={
+		'async': ['aiohttp~=3.8'],
+		'fast': ['orjson'],
+		'analytics': ['numpy'],
+		'http2': ['httpx[http2]'],
+	},
 	python_requires='>=3.6',
 	package_data={
 		"pylolzapi": ['api/*.py', 'utils/*.py', 'types/*.py']
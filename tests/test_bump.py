@@ -0,0 +1,30 @@
+from pylolzapi.utils.bump import BumpScheduler
+from pylolzapi.utils.exceptions import CircuitOpenError
+
+
+class FlakyApi:
+    def __init__(self):
+        self.open = True
+        self.bumped = []
+
+    def market_bump(self, item: int):
+        if self.open:
+            raise CircuitOpenError("API недоступно")
+        self.bumped.append(item)
+
+
+def test_item_bumped_after_breaker_recovers():
+    api = FlakyApi()
+    scheduler = BumpScheduler(api, retry_delay=0)
+    scheduler.extend([1, 2])
+
+    try:
+        scheduler.run_pending()
+    except CircuitOpenError:
+        pass
+
+    api.open = False
+    results = scheduler.run_pending()
+
+    assert sorted(result.item_id for result in results) == [1, 2]
+    assert sorted(api.bumped) == [1, 2]
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from pylolzapi.utils.decoder import ItemsStream
+
+DOCUMENT = {
+    "a": 1.5e3, "b": -2, "c": 0.25, "d": 7E-2, "e": 12, "f": True, "g": None,
+    "items": [{"item_id": 1, "price": 10.5}, {"item_id": 2, "price": 3e2}],
+    "total": 2, "ratio": -1.25e+1,
+}
+
+
+def parse(body: bytes, size: int) -> tuple[list, dict]:
+    stream = ItemsStream()
+    records = []
+    for i in range(0, len(body), size):
+        records += stream.feed(body[i:i + size])
+    records += stream.close()
+    return records, stream.meta
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_numbers_split_across_chunks(size):
+    body = json.dumps(DOCUMENT, separators=(",", ":")).encode()
+
+    records, meta = parse(body, size)
+
+    assert records == DOCUMENT["items"]
+    assert {key: value for key, value in meta.items() if key != "items"} == \
+        {key: value for key, value in DOCUMENT.items() if key != "items"}
+
+
+def test_number_split_after_dot_and_exponent():
+    records, meta = parse(b'{"a": 1.5e3, "items": []}', 1)
+
+    assert records == [] and meta["a"] == 1500.0
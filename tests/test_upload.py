@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from pylolzapi.utils.upload import UploadJournal
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    path = tmp_path / "upload.jsonl"
+    complete = json.dumps({"key": "a", "stage": "added", "item_id": 1}) + "\n"
+    path.write_text(complete + '{"key": "b", "stage": "add', encoding="utf-8")
+
+    journal = UploadJournal(str(path), fsync=False)
+    assert journal.state == {"a": {"key": "a", "stage": "added", "item_id": 1}}
+    assert path.read_text(encoding="utf-8") == complete
+
+    journal.write("b", "adding")
+    journal.close()
+    assert UploadJournal(str(path), fsync=False).state["b"]["stage"] == "adding"
+
+
+def test_unterminated_last_line_is_kept(tmp_path):
+    path = tmp_path / "upload.jsonl"
+    path.write_text(json.dumps({"key": "a", "stage": "checked", "item_id": 1}), encoding="utf-8")
+
+    journal = UploadJournal(str(path), fsync=False)
+    journal.write("b", "adding")
+    journal.close()
+
+    state = UploadJournal(str(path), fsync=False).state
+    assert state["a"]["stage"] == "checked" and state["b"]["stage"] == "adding"
+
+
+def test_corruption_before_tail_raises(tmp_path):
+    path = tmp_path / "upload.jsonl"
+    path.write_text('{"key": "a", "sta\n' + json.dumps({"key": "b", "stage": "adding"}) + "\n", encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        UploadJournal(str(path), fsync=False)